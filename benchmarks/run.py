@@ -0,0 +1,235 @@
+"""Benchmark of augmentations exported from ecgmentations.augmentations
+
+    usage:
+        python benchmarks/run.py
+        python benchmarks/run.py --transforms GaussBlur Pooling[median] --lengths 1000 100000 --leads 12
+        python benchmarks/run.py --csv current.csv --compare baseline.csv
+"""
+import os
+import sys
+import csv
+import time
+import inspect
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ecgmentations as E
+import ecgmentations.augmentations as A
+
+from ecgmentations.core.augmentation import Augmentation
+
+COLUMNS = ('transform', 'length', 'leads', 'dtype', 'batch', 'time_ms', 'samples_per_sec', 'peak_memory_mb')
+
+def get_length_dependent_args(length):
+    """Get initialization arguments of transforms depending on record length
+    """
+    return {
+        'TimeCrop': {'length': length // 2},
+        'CenterTimeCrop': {'length': length // 2},
+        'RandomTimeCrop': {'length': length // 2},
+        'TimePadIfNeeded': {'min_length': 2 * length},
+    }
+
+VARIANTS = {
+    'Pooling[median]': (A.Pooling, {'reduction': E.ReductionType.MEDIAN}),
+    'Pooling[max]': (A.Pooling, {'reduction': E.ReductionType.MAX}),
+    'GaussBlur[101]': (A.GaussBlur, {'variance': 100., 'kernel_size_range': (101, 101)}),
+    'LowPassFilter[range]': (A.LowPassFilter, {'cutoff_frequency': (30., 47.)}),
+}
+
+def is_benchmarkable(cls):
+    """Check that class is augmentation that can be created with default arguments
+    """
+    if not issubclass(cls, Augmentation) or cls.__module__.startswith('ecgmentations.core'):
+        return False
+
+    parameters = list(inspect.signature(cls.__init__).parameters.values())[1:]
+
+    return all(parameter.default is not inspect.Parameter.empty for parameter in parameters)
+
+def get_cases():
+    """
+        :return:
+            output: dict
+                classes and extra initialization arguments of benchmarked transforms by names
+    """
+    cases = {name: (cls, {}) for name, cls in inspect.getmembers(A, inspect.isclass) if is_benchmarkable(cls)}
+    cases.update(VARIANTS)
+
+    return cases
+
+def create_transform(cls, args, length):
+    args = dict(args)
+    args.update(get_length_dependent_args(length).get(cls.__name__, {}))
+
+    return cls(always_apply=True, **args).set_random_state(0)
+
+def create_input(length, leads, dtype, batch):
+    """
+        :NOTE:
+            batch size of 1 means single record of shape (length, leads)
+    """
+    shape = (length, leads) if batch == 1 else (batch, length, leads)
+
+    return np.random.default_rng(0).standard_normal(shape).astype(dtype)
+
+def measure_time(func, min_time, repeat):
+    """
+        :return:
+            output: float
+                the best time of one call in seconds
+    """
+    func()
+
+    number = 1
+
+    while True:
+        start = time.perf_counter()
+
+        for _ in range(number):
+            func()
+
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time / repeat:
+            break
+
+        number *= 2
+
+    best = elapsed / number
+
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+
+        for _ in range(number):
+            func()
+
+        best = min(best, (time.perf_counter() - start) / number)
+
+    return best
+
+def measure_peak_memory(func):
+    """
+        :return:
+            output: int
+                peak size of memory allocated during one call in bytes
+    """
+    tracemalloc.start()
+
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+def run_case(cls, args, length, leads, dtype, batch, min_time, repeat):
+    transform = create_transform(cls, args, length)
+    ecg = create_input(length, leads, dtype, batch)
+
+    func = lambda: transform(ecg=ecg, batched=batch != 1)
+
+    seconds = measure_time(func, min_time, repeat)
+    peak = measure_peak_memory(func)
+
+    return {
+        'time_ms': seconds * 1e3,
+        'samples_per_sec': batch * length / seconds,
+        'peak_memory_mb': peak / 2**20,
+    }
+
+def format_row(row):
+    return '{transform:<24} {length:>7} {leads:>5} {dtype:>8} {batch:>5} {time_ms:>10.3f} {samples_per_sec:>15.3e} ' \
+           '{peak_memory_mb:>14.2f}'.format(**row)
+
+def format_header():
+    return '{:<24} {:>7} {:>5} {:>8} {:>5} {:>10} {:>15} {:>14}'.format(*COLUMNS)
+
+def load_rows(path):
+    with open(path, newline='') as f:
+        return {
+            (row['transform'], int(row['length']), int(row['leads']), row['dtype'], int(row['batch'])): float(row['time_ms'])
+            for row in csv.DictReader(f)
+        }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of ecgmentations augmentations')
+
+    parser.add_argument('--transforms', nargs='+', default=None, help='names of transforms to benchmark, all by default')
+    parser.add_argument('--lengths', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--leads', nargs='+', type=int, default=[1, 3, 12])
+    parser.add_argument('--dtypes', nargs='+', default=['float32', 'float64'])
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 16],
+                        help='batch size of 1 means single record without batch dimension')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimal time in seconds to measure one case')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements to select the best time')
+    parser.add_argument('--csv', default=None, help='path to save results')
+    parser.add_argument('--compare', default=None, help='path to results of previous run to report regressions')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio to report as regression')
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    cases = get_cases()
+    names = args.transforms or sorted(cases)
+
+    unknown = [name for name in names if name not in cases]
+
+    if unknown:
+        raise ValueError('Get unknown transforms: {}. Must be some of {}.'.format(unknown, sorted(cases)))
+
+    baseline = load_rows(args.compare) if args.compare else {}
+
+    rows = []
+    regressions = []
+
+    print(format_header())
+
+    for name in names:
+        cls, init_args = cases[name]
+
+        for length in args.lengths:
+            for leads in args.leads:
+                for dtype in args.dtypes:
+                    for batch in args.batch_sizes:
+                        row = {'transform': name, 'length': length, 'leads': leads, 'dtype': dtype, 'batch': batch}
+
+                        try:
+                            row.update(run_case(cls, init_args, length, leads, dtype, batch, args.min_time, args.repeat))
+                        except Exception as e:
+                            print('{:<24} {:>7} {:>5} {:>8} {:>5} failed: {}'.format(name, length, leads, dtype, batch, e))
+                            continue
+
+                        print(format_row(row), flush=True)
+                        rows.append(row)
+
+                        key = (name, length, leads, dtype, batch)
+
+                        if key in baseline and row['time_ms'] > args.threshold * baseline[key]:
+                            regressions.append((row, baseline[key]))
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    if regressions:
+        print('\nRegressions:')
+
+        for row, time_ms in regressions:
+            print('{} was {:.3f} ms, x{:.2f} slower'.format(format_row(row), time_ms, row['time_ms'] / time_ms))
+
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,5 @@
 from ecgmentations.__version__ import __version__
 from ecgmentations.core import *
-from ecgmentations.augmentations import *
\ No newline at end of file
+from ecgmentations.augmentations import *
+
+from ecgmentations import parallel
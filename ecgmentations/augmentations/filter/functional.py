@@ -1,24 +1,190 @@
+import numpy as np
 import scipy as sp
 
-def lowpass_filter(ecg, ecg_frequency, cutoff_frequency):
-    params = sp.signal.butter(3, cutoff_frequency, 'low', analog=False, fs=ecg_frequency)
-    ecg = sp.signal.lfilter(*params, ecg).astype(ecg.dtype)
+from functools import lru_cache
 
-    return ecg
+import ecgmentations.core.enum as E
+import ecgmentations.core.constants as C
+import ecgmentations.augmentations.functional as F
 
-def highpass_filter(ecg, ecg_frequency, cutoff_frequency):
-    params = sp.signal.butter(3, cutoff_frequency, 'high', analog=False, fs=ecg_frequency)
-    ecg = sp.signal.lfilter(*params, ecg).astype(ecg.dtype)
+@lru_cache(maxsize=128)
+def butterworth_sos(order, cutoff_frequencies, btype, ecg_frequency):
+    """Design Butterworth filter in second-order sections form
 
-    return ecg
+        :NOTE:
+            filters are cached, so cutoff_frequencies should be hashable (float or tuple of float)
+    """
+    return sp.signal.butter(order, cutoff_frequencies, btype, analog=False, fs=ecg_frequency, output='sos')
 
-def bandpass_filter(ecg, ecg_frequency, cutoff_frequencies):
-    params = sp.signal.butter(3, cutoff_frequencies, 'bandpass', analog=False, fs=ecg_frequency)
-    ecg = sp.signal.lfilter(*params, ecg).astype(ecg.dtype)
+def butterworth_sos_bank(order, cutoff_frequencies, btype, ecg_frequency):
+    """Design bank of Butterworth filters in second-order sections form
 
-    return ecg
+        :args:
+            cutoff_frequencies: np.array of shape (num_filters, ) or (num_filters, 2)
+                cutoff frequencies of each filter in bank
+
+        :return:
+            output: np.array of shape (num_filters, num_sections, 6)
+                second-order sections of each filter in bank
+    """
+    return np.stack([
+        sp.signal.butter(order, cutoff, btype, analog=False, fs=ecg_frequency, output='sos') for cutoff in cutoff_frequencies
+    ])
+
+def sos_steady_state_bank(bank):
+    """Compute steady states of bank of filters for the unit step input
+
+        :return:
+            output: np.array of shape (num_filters, num_sections, 2)
+                initial states of sections of each filter in bank
+    """
+    return np.stack([sp.signal.sosfilt_zi(sos) for sos in bank])
+
+def get_sos_compute_dtype(sos, dtype):
+    """Get floating type to apply the filter to the ecg of the type
+
+        :NOTE:
+            filters with poles close to the unit circle (for example, highpass with very low cutoff) are unstable in float32,
+            so they are applied in float64
+    """
+    dtype = F.get_compute_dtype(dtype)
+
+    if dtype == np.float64:
+        return dtype
+
+    a1, a2 = sos[..., 4] / sos[..., 3], sos[..., 5] / sos[..., 3]
+    discriminant = a1 ** 2 - 4 * a2
+
+    radius = np.where(
+        discriminant < 0,
+        np.sqrt(np.abs(a2)),
+        (np.abs(a1) + np.sqrt(np.abs(discriminant))) / 2,
+    )
+
+    if 1 - np.max(radius) < C.MIN_FLOAT32_SOS_POLE_DISTANCE:
+        return np.dtype(np.float64)
+
+    return dtype
+
+def get_sos_padlen(sos):
+    """Get default length of padding of sosfiltfilt for the filter
+    """
+    ntaps = 2 * sos.shape[0] + 1
+    ntaps -= min(np.count_nonzero(sos[:, 2] == 0), np.count_nonzero(sos[:, 5] == 0))
+
+    return 3 * ntaps
+
+def get_steady_state(ecg, sos, steady_state=None):
+    """Get initial state of the filter of the ecg or the batch of ecgs as if its first samples lasted forever
+
+        :args:
+            steady_state: np.array of shape (num_sections, 2) or None
+                precomputed result of sosfilt_zi for the filter, if None it is computed
+
+        :return:
+            output: np.array
+                initial state of the filter for sosfilt along time axis
+    """
+    dim = F.get_spatial_dim(ecg)
+
+    if steady_state is None:
+        steady_state = sp.signal.sosfilt_zi(sos)
+
+    shape = (sos.shape[0], ) + (1, ) * dim + (2, ) + (1, ) * (ecg.ndim - dim - 1)
+    first = ecg[F.get_spatial_index(ecg, slice(0, 1))]
+
+    return np.reshape(steady_state, shape) * first[None]
+
+def sos_filter(ecg, sos, mode=E.FilterMode.CAUSAL, steady_state=None):
+    """Filter all channels of the ecg or the batch of ecgs along time axis
+
+        :NOTE:
+            filter is applied in compute type of the ecg if it is stable in it, so float32 ecgs are usually filtered
+            without float64 arrays
+
+            sosfilt makes one working copy of the ecg with time axis last converted to the type of sos,
+            so the ecg is not converted beforehand and only the result is copied back to the time first layout
+
+            in E.FilterMode.ZERO_PHASE mode the ecg is padded by odd extension of sosfiltfilt default length
+            (3 * (2 * num_sections + 1) samples) clamped to length of the ecg - 1, so ecgs of any length are filtered
+
+        :args:
+            mode: FilterMode
+                causal filtering from zero state, causal filtering from steady state or zero-phase forward-backward
+                filtering
+            steady_state: np.array of shape (num_sections, 2) or None
+                precomputed result of sosfilt_zi for the filter in E.FilterMode.STEADY_STATE mode
+    """
+    dim = F.get_spatial_dim(ecg)
+    dtype = get_sos_compute_dtype(sos, ecg.dtype)
+
+    if ecg.shape[dim] == 0:
+        return np.copy(ecg)
+
+    sos = sos.astype(dtype, copy=False)
+
+    if mode == E.FilterMode.ZERO_PHASE:
+        padlen = min(get_sos_padlen(sos), ecg.shape[dim] - 1)
+        ecg_ = sp.signal.sosfiltfilt(sos, ecg, axis=dim, padlen=padlen)
+    elif mode == E.FilterMode.STEADY_STATE:
+        zi = get_steady_state(ecg, sos, steady_state).astype(dtype, copy=False)
+        ecg_, _ = sp.signal.sosfilt(sos, ecg, axis=dim, zi=zi)
+    else:
+        ecg_ = sp.signal.sosfilt(sos, ecg, axis=dim)
+
+    return np.ascontiguousarray(ecg_, dtype=ecg.dtype)
+
+def sos_filter_chunk(ecg, sos, zi=None, steady_state=None):
+    """Filter the chunk of the ecg along time axis continuing from the state of the filter after previous chunk
+
+        :args:
+            zi: np.array or None
+                state of the filter after previous chunk, if None the chunk is the first one
+            steady_state: np.array of shape (num_sections, 2) or None
+                result of sosfilt_zi to start the first chunk from steady state, if None the first chunk starts from zero state
+
+        :return:
+            output: (np.array, np.array)
+                filtered chunk and state of the filter after it
+    """
+    dim = F.get_spatial_dim(ecg)
+    dtype = get_sos_compute_dtype(sos, ecg.dtype)
+
+    if ecg.shape[dim] == 0:
+        return np.copy(ecg), zi
+
+    if zi is None and steady_state is not None:
+        zi = get_steady_state(ecg, sos, steady_state).astype(dtype, copy=False)
+    elif zi is None:
+        zi = np.zeros((sos.shape[0], ) + ecg.shape[:dim] + (2, ) + ecg.shape[dim+1:], dtype=dtype)
+
+    ecg_, zf = sp.signal.sosfilt(sos.astype(dtype, copy=False), ecg, axis=dim, zi=zi)
+
+    return np.ascontiguousarray(ecg_, dtype=ecg.dtype), zf
+
+def lowpass_filter(ecg, ecg_frequency, cutoff_frequency, mode=E.FilterMode.CAUSAL):
+    sos = butterworth_sos(3, cutoff_frequency, 'low', ecg_frequency)
+
+    return sos_filter(ecg, sos, E.FilterMode(mode))
+
+def highpass_filter(ecg, ecg_frequency, cutoff_frequency, mode=E.FilterMode.CAUSAL):
+    sos = butterworth_sos(3, cutoff_frequency, 'high', ecg_frequency)
+
+    return sos_filter(ecg, sos, E.FilterMode(mode))
+
+def bandpass_filter(ecg, ecg_frequency, cutoff_frequencies, mode=E.FilterMode.CAUSAL):
+    sos = butterworth_sos(3, tuple(cutoff_frequencies), 'bandpass', ecg_frequency)
+
+    return sos_filter(ecg, sos, E.FilterMode(mode))
 
 def sigmoid_compression(ecg):
-    ecg = sp.special.expit(ecg)
+    """
+        :NOTE:
+            floating ecgs keep own type, other ecgs are compressed to float64
+    """
+    necg = sp.special.expit(ecg.astype(F.get_compute_dtype(ecg.dtype), copy=False))
+
+    if ecg.dtype.kind == 'f':
+        necg = necg.astype(ecg.dtype, copy=False)
 
-    return ecg
+    return necg
@@ -1,15 +1,140 @@
+import numpy as np
+
+import ecgmentations.core.enum as E
 import ecgmentations.augmentations.misc as M
 import ecgmentations.augmentations.filter.functional as F
 
 from ecgmentations.core.augmentation import EcgOnlyAugmentation
 
-class LowPassFilter(EcgOnlyAugmentation):
+class ButterworthFilter(EcgOnlyAugmentation):
+    """Root class for Butterworth filters with fixed or randomized cutoff frequencies
+    """
+    ORDER = 3
+
+    def __init__(
+            self,
+            ecg_frequency,
+            bank_size,
+            bank_memory_limit,
+            mode,
+            always_apply,
+            p,
+        ):
+        """
+            :NOTE:
+                if cutoff frequencies are ranges, filters are designed in construction for quantized cutoff
+                frequencies and filter is selected randomly from bank during application
+
+            :args:
+                ecg_frequency: float
+                    frequency of the input ecg
+                bank_size: int
+                    maximal number of filters in bank
+                bank_memory_limit: int
+                    maximal memory in bytes of filters in bank
+                mode: FilterMode
+                    mode of filtering, see param of LowPassFilter
+        """
+        super(ButterworthFilter, self).__init__(always_apply, p)
+
+        self.ecg_frequency = M.prepare_non_negative_float(ecg_frequency, 'ecg_frequency')
+
+        self.bank_size = M.prepare_non_negative_int(bank_size, 'bank_size')
+        self.bank_memory_limit = M.prepare_non_negative_int(bank_memory_limit, 'bank_memory_limit')
+
+        self.mode = E.FilterMode(mode)
+
+    def build_bank(self, btype, cutoff_frequencies):
+        """
+            :args:
+                btype: str
+                    type of filter
+                cutoff_frequencies: list of float or (float, float)
+                    each cutoff frequency or its range of filter
+        """
+        cutoff_ranges = [c if isinstance(c, tuple) else (c, c) for c in cutoff_frequencies]
+
+        ndims = len(cutoff_ranges)
+
+        cutoff_frequency = np.mean(cutoff_ranges, axis=1) if ndims > 1 else np.mean(cutoff_ranges)
+
+        filter_nbytes = F.butterworth_sos_bank(self.ORDER, [cutoff_frequency], btype, self.ecg_frequency).nbytes
+        bank_size = max(min(self.bank_size, self.bank_memory_limit // filter_nbytes), 1)
+
+        num_ranges = max(sum(low < high for low, high in cutoff_ranges), 1)
+        num_levels = int(np.floor(bank_size ** (1 / num_ranges) + 1e-9))
+
+        grids = [
+            np.linspace(low, high, num_levels) if low < high else np.array([low]) for low, high in cutoff_ranges
+        ]
+
+        cutoff_frequencies = np.stack(np.meshgrid(*grids, indexing='ij'), axis=-1).reshape(-1, ndims)
+
+        if ndims == 1:
+            cutoff_frequencies = cutoff_frequencies[:, 0]
+
+        self.bank = F.butterworth_sos_bank(self.ORDER, cutoff_frequencies, btype, self.ecg_frequency)
+        self.bank_steady_states = F.sos_steady_state_bank(self.bank) if self.mode == E.FilterMode.STEADY_STATE else None
+
+    def get_steady_state(self, filter_index):
+        return self.bank_steady_states[filter_index] if self.bank_steady_states is not None else None
+
+    def apply(self, ecg, filter_index, **params):
+        return F.sos_filter(ecg, self.bank[filter_index], self.mode, self.get_steady_state(filter_index))
+
+    def apply_batch(self, ecg, filter_index, **params):
+        necg = np.empty_like(ecg)
+
+        for index in np.unique(filter_index):
+            indices = filter_index == index
+            necg[indices] = F.sos_filter(ecg[indices], self.bank[index], self.mode, self.get_steady_state(index))
+
+        return necg
+
+    def check_streaming(self):
+        if self.mode == E.FilterMode.ZERO_PHASE:
+            raise NotImplementedError(
+                'Class {} does not support streaming in {} mode'.format(self.get_class_name(), self.mode)
+            )
+
+    def apply_to_stream(self, chunks, length, filter_index, **params):
+        zi = None
+
+        for chunk in chunks:
+            chunk, zi = F.sos_filter_chunk(chunk, self.bank[filter_index], zi, self.get_steady_state(filter_index))
+
+            yield chunk
+
+    def get_params(self):
+        """
+            :NOTE:
+                bank of fixed cutoff frequencies has one filter, so random state is not used
+        """
+        filter_index = self.random_state.integers(len(self.bank)) if len(self.bank) > 1 else 0
+
+        return {'filter_index': filter_index}
+
+    def get_batch_params(self, batch_size):
+        if len(self.bank) == 1:
+            return {'filter_index': np.zeros(batch_size, dtype=np.int64)}
+
+        filter_index = self.random_state.integers(len(self.bank), size=batch_size)
+
+        return {'filter_index': filter_index}
+
+    def get_transform_init_args_names(self):
+        return ('ecg_frequency', 'bank_size', 'bank_memory_limit', 'mode')
+
+class LowPassFilter(ButterworthFilter):
     """Apply low-pass filter to the input ecg.
     """
     def __init__(
             self,
             ecg_frequency=500.,
             cutoff_frequency=47.,
+            bank_size=32,
+            bank_memory_limit=2**20,
+            mode=E.FilterMode.CAUSAL,
             always_apply=False,
             p=1.0,
         ):
@@ -21,27 +146,37 @@ class LowPassFilter(EcgOnlyAugmentation):
             :args:
                 ecg_frequency: float
                     frequency of the input ecg
-                cutoff_frequency: float
-                    cutoff frequency for filter
+                cutoff_frequency: float or (float, float)
+                    cutoff frequency or range of cutoff frequency for filter
+                bank_size: int
+                    maximal number of filters in bank for range of cutoff frequency
+                bank_memory_limit: int
+                    maximal memory in bytes of filters in bank for range of cutoff frequency
+                mode: FilterMode
+                    E.FilterMode.CAUSAL (default) filters forward from zero state,
+                    E.FilterMode.STEADY_STATE filters forward from steady state for the first sample of the ecg without start transient,
+                    E.FilterMode.ZERO_PHASE filters forward and backward without phase distortion (does not support streaming),
+                    ecgs shorter than 3 * (2 * num_sections + 1) samples are padded by shorter odd extension
         """
-        super(LowPassFilter, self).__init__(always_apply, p)
+        super(LowPassFilter, self).__init__(ecg_frequency, bank_size, bank_memory_limit, mode, always_apply, p)
 
-        self.ecg_frequency = M.prepare_non_negative_float(ecg_frequency, 'ecg_frequency')
-        self.cutoff_frequency = M.prepare_non_negative_float(cutoff_frequency, 'cutoff_frequency')
+        self.cutoff_frequency = M.prepare_non_negative_float_or_asymrange(cutoff_frequency, 'cutoff_frequency')
 
-    def apply(self, ecg, **params):
-        return F.lowpass_filter(ecg, self.ecg_frequency, self.cutoff_frequency)
+        self.build_bank('low', [self.cutoff_frequency])
 
     def get_transform_init_args_names(self):
-        return ('ecg_frequency', 'cutoff_frequency')
+        return ('ecg_frequency', 'cutoff_frequency', 'bank_size', 'bank_memory_limit', 'mode')
 
-class HighPassFilter(EcgOnlyAugmentation):
+class HighPassFilter(ButterworthFilter):
     """Apply high-pass filter to the input ecg.
     """
     def __init__(
             self,
             ecg_frequency=500.,
             cutoff_frequency=0.5,
+            bank_size=32,
+            bank_memory_limit=2**20,
+            mode=E.FilterMode.CAUSAL,
             always_apply=False,
             p=1.0,
         ):
@@ -53,27 +188,34 @@ class HighPassFilter(EcgOnlyAugmentation):
             :args:
                 ecg_frequency: float
                     frequency of the input ecg
-                cutoff_frequency: float
-                    cutoff frequency for filter
+                cutoff_frequency: float or (float, float)
+                    cutoff frequency or range of cutoff frequency for filter
+                bank_size: int
+                    maximal number of filters in bank for range of cutoff frequency
+                bank_memory_limit: int
+                    maximal memory in bytes of filters in bank for range of cutoff frequency
+                mode: FilterMode
+                    mode of filtering, see param of LowPassFilter
         """
-        super(HighPassFilter, self).__init__(always_apply, p)
+        super(HighPassFilter, self).__init__(ecg_frequency, bank_size, bank_memory_limit, mode, always_apply, p)
 
-        self.ecg_frequency = M.prepare_non_negative_float(ecg_frequency, 'ecg_frequency')
-        self.cutoff_frequency = M.prepare_non_negative_float(cutoff_frequency, 'cutoff_frequency')
+        self.cutoff_frequency = M.prepare_non_negative_float_or_asymrange(cutoff_frequency, 'cutoff_frequency')
 
-    def apply(self, ecg, **params):
-        return F.highpass_filter(ecg, self.ecg_frequency, self.cutoff_frequency)
+        self.build_bank('high', [self.cutoff_frequency])
 
     def get_transform_init_args_names(self):
-        return ('ecg_frequency', 'cutoff_frequency')
+        return ('ecg_frequency', 'cutoff_frequency', 'bank_size', 'bank_memory_limit', 'mode')
 
-class BandPassFilter(EcgOnlyAugmentation):
+class BandPassFilter(ButterworthFilter):
     """Apply band-pass filter to the input ecg.
     """
     def __init__(
             self,
             ecg_frequency=500.,
             cutoff_frequencies=(0.5, 47.),
+            bank_size=32,
+            bank_memory_limit=2**20,
+            mode=E.FilterMode.CAUSAL,
             always_apply=False,
             p=1.0,
         ):
@@ -82,22 +224,46 @@ class BandPassFilter(EcgOnlyAugmentation):
                 cutoff_frequencies:
                     see params of LowPassFilter and HighPassFilter
 
+                if cutoff frequencies are ranges, bank is grid of quantized low and high cutoff frequencies,
+                so ranges must not overlap
+
             :args:
                 ecg_frequency: float
                     frequency of the input ecg
-                cutoff_frequencies: tuple of float
-                    cutoff frequencies for filter
+                cutoff_frequencies: (float, float) or ((float, float), (float, float))
+                    cutoff frequencies or ranges of low and high cutoff frequencies for filter
+                bank_size: int
+                    maximal number of filters in bank for ranges of cutoff frequencies
+                bank_memory_limit: int
+                    maximal memory in bytes of filters in bank for ranges of cutoff frequencies
+                mode: FilterMode
+                    mode of filtering, see param of LowPassFilter
         """
-        super(BandPassFilter, self).__init__(always_apply, p)
+        super(BandPassFilter, self).__init__(ecg_frequency, bank_size, bank_memory_limit, mode, always_apply, p)
 
-        self.ecg_frequency = M.prepare_non_negative_float(ecg_frequency, 'ecg_frequency')
-        self.cutoff_frequencies = M.prepare_float_asymrange(cutoff_frequencies, 'cutoff_frequencies', low=0.)
+        if isinstance(cutoff_frequencies, (tuple, list)) and all(isinstance(c, (tuple, list)) for c in cutoff_frequencies):
+            if len(cutoff_frequencies) != 2:
+                raise ValueError('Invalid value of cutoff_frequencies. Got {}'.format(cutoff_frequencies))
 
-    def apply(self, ecg, **params):
-        return F.bandpass_filter(ecg, self.ecg_frequency, self.cutoff_frequencies)
+            self.cutoff_frequencies = tuple(
+                M.prepare_float_asymrange(c, 'cutoff_frequencies', low=0.) for c in cutoff_frequencies
+            )
+        else:
+            self.cutoff_frequencies = M.prepare_float_asymrange(cutoff_frequencies, 'cutoff_frequencies', low=0.)
+
+        low, high = [c if isinstance(c, tuple) else (c, c) for c in self.cutoff_frequencies]
+
+        if low[1] >= high[0]:
+            raise ValueError(
+                'Invalid value of cutoff_frequencies. Got {} with low cutoff frequencies not less than high ones.'.format(
+                    cutoff_frequencies
+                )
+            )
+
+        self.build_bank('bandpass', self.cutoff_frequencies)
 
     def get_transform_init_args_names(self):
-        return ('ecg_frequency', 'cutoff_frequencies')
+        return ('ecg_frequency', 'cutoff_frequencies', 'bank_size', 'bank_memory_limit', 'mode')
 
 class SigmoidCompression(EcgOnlyAugmentation):
     """Apply sigmoid compression to the input ecg.
@@ -112,5 +278,11 @@ class SigmoidCompression(EcgOnlyAugmentation):
     def apply(self, ecg, **params):
         return F.sigmoid_compression(ecg)
 
+    def get_time_margin(self, **params):
+        return 0
+
+    def get_crop_margin(self):
+        return 0
+
     def get_transform_init_args_names(self):
         return tuple()
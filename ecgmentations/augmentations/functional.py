@@ -1,5 +1,7 @@
 import numpy as np
+import scipy as sp
 
+import ecgmentations.core.enum as E
 import ecgmentations.core.constants as C
 import ecgmentations.augmentations.time.functional as TF
 
@@ -15,39 +17,89 @@ def apply_along_dim(data, func, dim):
 
     return data
 
-def amplitude_invert(ecg):
-    return np.negative(ecg)
+def get_compute_dtype(dtype):
+    """Get floating type to compute operations on the ecg of the type
+
+        :NOTE:
+            float16 ecgs are computed in float32, other floating ecgs are computed in own type to avoid temporary float64 arrays,
+            not floating ecgs are computed in float64
+    """
+    dtype = np.dtype(dtype)
+
+    if dtype.kind == 'f':
+        return np.promote_types(dtype, np.float32)
+
+    return np.dtype(np.float64)
+
+def get_spatial_dim(ecg):
+    """Get spatial dim of the ecg or the batch of ecgs
+    """
+    if len(ecg.shape) == C.NUM_BATCH_DIMENSIONS:
+        return C.BATCH_SPATIAL_DIM
+    else:
+        return C.SPATIAL_DIM
+
+def get_spatial_index(ecg, index):
+    """Get index of the ecg or the batch of ecgs that selects index along time axis
+    """
+    indices = [slice(None)] * len(ecg.shape)
+    indices[get_spatial_dim(ecg)] = index
+
+    return tuple(indices)
+
+def amplitude_invert(ecg, out=None):
+    return np.negative(ecg, out=out)
 
 def channel_shuffle(ecg, channel_order):
     ecg = ecg[:, channel_order]
 
     return np.require(ecg, requirements=['C_CONTIGUOUS'])
 
-def channel_dropout(ecg, channels_to_drop, fill_value):
-    ecg = np.copy(ecg)
-    ecg[:, channels_to_drop] = fill_value
+def channel_dropout(ecg, channels_to_drop, fill_value, out=None):
+    if out is None:
+        out = np.copy(ecg)
+    elif out is not ecg:
+        out[:] = ecg
+
+    out[:, channels_to_drop] = fill_value
 
-    return ecg
+    return out
 
-def add(ecg, other):
+def add(ecg, other, out=None):
     if len(ecg.shape) > len(other.shape):
-        other = np.expand_dims(other, axis=C.CHANNEL_DIM)
+        other = np.expand_dims(other, axis=-1)
 
-    return np.add(ecg, other, dtype=ecg.dtype)
+    return np.add(ecg, other, out=out, dtype=ecg.dtype)
 
 def conv(ecg, kernel, border_mode, fill_value):
-    pad_width = kernel.size // 2
+    """Correlate all channels of the ecg or the batch of ecgs with the kernel along time axis
+
+        :NOTE:
+            short kernels are applied directly, long kernels are applied with FFT
+    """
+    dim = get_spatial_dim(ecg)
+    dtype = ecg.dtype
+
+    if dtype == np.float16:
+        ecg = ecg.astype(np.float32)
 
-    ecg = TF.pad(ecg, pad_width, pad_width, border_mode, fill_value)
+    kernel = kernel.astype(get_compute_dtype(dtype), copy=False)
 
-    func = lambda arr: np.correlate(arr, kernel, mode='valid').astype(arr.dtype)
+    if kernel.size < C.MIN_FFT_CONV_KERNEL_SIZE:
+        cval = fill_value if border_mode == E.BorderType.CONSTANT else 0.
 
-    if len(ecg.shape) == C.NUM_MULTI_CHANNEL_DIMENSIONS:
-        ecg = apply_along_dim(ecg, func, C.CHANNEL_DIM)
+        ecg = sp.ndimage.correlate1d(ecg, kernel, axis=dim, mode=C.MAP_BORDER_TYPE_TO_SC[border_mode], cval=cval)
     else:
-        ecg = func(ecg)
+        pad_width = kernel.size // 2
 
-    return np.require(ecg, requirements=['C_CONTIGUOUS'])
+        ecg = TF.pad(ecg, pad_width, pad_width, border_mode, fill_value)
+
+        kernel_shape = [1] * len(ecg.shape)
+        kernel_shape[dim] = kernel.size
+
+        ecg = sp.signal.fftconvolve(ecg, np.reshape(kernel[::-1], kernel_shape), mode='valid', axes=dim)
+
+    return np.require(ecg.astype(dtype, copy=False), requirements=['C_CONTIGUOUS'])
 
-def multiply(ecg, factor):
-    return np.multiply(ecg, factor, dtype=ecg.dtype)
+def multiply(ecg, factor, out=None):
+    return np.multiply(ecg, factor, out=out, dtype=ecg.dtype)
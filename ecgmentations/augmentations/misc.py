@@ -144,3 +144,9 @@ def prepare_float_asymrange(param, name, low):
         )
 
     return tuple(param)
+
+def prepare_non_negative_float_or_asymrange(param, name):
+    if isinstance(param, (tuple, list)):
+        return prepare_float_asymrange(param, name, 0.)
+    else:
+        return prepare_non_negative_float(param, name)
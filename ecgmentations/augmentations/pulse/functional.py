@@ -1,26 +1,147 @@
 import numpy as np
 import scipy as sp
 
+from functools import lru_cache
+
 import ecgmentations.core.constants as C
+import ecgmentations.augmentations.functional as F
+
+def get_time_grid(length, ecg_frequency):
+    """Get time points of the ecg in seconds
+
+        :NOTE:
+            grids of ecgs longer than C.MAX_CACHED_PULSE_LENGTH are not cached to bound memory of the cache
+    """
+    if length > C.MAX_CACHED_PULSE_LENGTH:
+        return np.linspace(0, length / ecg_frequency, length)
 
-def add_sine_pulse(ecg, ecg_frequency, amplitude, frequency, phase):
-    length = ecg.shape[C.SPATIAL_DIM]
+    return get_cached_time_grid(length, ecg_frequency)
 
+@lru_cache(maxsize=32)
+def get_cached_time_grid(length, ecg_frequency):
     t = np.linspace(0, length / ecg_frequency, length)
-    pulse = amplitude * np.sin(2 * np.pi * frequency * t + phase)
+    t.setflags(write=False)
 
-    if len(ecg.shape) == C.NUM_MULTI_CHANNEL_DIMENSIONS:
-        pulse = np.expand_dims(pulse, axis=C.CHANNEL_DIM)
+    return t
 
-    return np.add(ecg, pulse, dtype=ecg.dtype)
+def get_time_points(length, ecg_frequency, start=0, stop=None):
+    """Get time points of the part [start, stop) of the ecg in seconds
 
-def add_square_pulse(ecg, ecg_frequency, amplitude, frequency, phase):
-    length = ecg.shape[C.SPATIAL_DIM]
+        :NOTE:
+            time points are equal to the slice of the time grid of the whole ecg, but only the part is allocated
+    """
+    if start == 0 and (stop is None or stop == length):
+        return get_time_grid(length, ecg_frequency)
 
-    t = np.linspace(0, length / ecg_frequency, length)
-    pulse = amplitude * sp.signal.square(2 * np.pi * frequency * t + phase)
+    duration = length / ecg_frequency
+
+    t = np.arange(start, stop) * (duration / (length - 1))
+
+    if stop == length:
+        t[-1] = duration
+
+    return t
+
+def compute_sine_waveforms(t, frequency, dtype):
+    return (
+        np.sin(2 * np.pi * frequency * t).astype(dtype, copy=False),
+        np.cos(2 * np.pi * frequency * t).astype(dtype, copy=False),
+    )
+
+def get_sine_waveforms(length, ecg_frequency, frequency, dtype=np.float64):
+    """Get sine and cosine waveforms of the frequency with zero phase
+
+        :NOTE:
+            waveforms of ecgs longer than C.MAX_CACHED_PULSE_LENGTH are not cached to bound memory of the cache
+    """
+    if length > C.MAX_CACHED_PULSE_LENGTH:
+        return compute_sine_waveforms(get_time_grid(length, ecg_frequency), frequency, dtype)
+
+    return get_cached_sine_waveforms(length, ecg_frequency, frequency, dtype)
+
+@lru_cache(maxsize=32)
+def get_cached_sine_waveforms(length, ecg_frequency, frequency, dtype=np.float64):
+    t = get_cached_time_grid(length, ecg_frequency)
+
+    waveforms = compute_sine_waveforms(t, frequency, dtype)
+
+    for waveform in waveforms:
+        waveform.setflags(write=False)
+
+    return waveforms
+
+def expand_pulse_params(*params):
+    """Prepare scalar or per-sample params to broadcast along time axis
+    """
+    return [np.expand_dims(param, axis=-1) for param in params]
+
+def sine_pulse(length, ecg_frequency, amplitude, frequency, phase, dtype=np.float64, start=0, stop=None):
+    """
+        :NOTE:
+            pulse is generated in compute type of dtype of the ecg,
+            but argument of sine is computed in float64 to keep phase accurate for long ecgs
+
+            if start or stop is set, only the part [start, stop) of the pulse of the ecg of the length is generated
+    """
+    dtype = F.get_compute_dtype(dtype)
+    amplitude, frequency, phase = expand_pulse_params(amplitude, frequency, phase)
+
+    t = get_time_points(length, ecg_frequency, start, stop)
+
+    pulse = np.sin(2 * np.pi * frequency * t + phase).astype(dtype, copy=False)
+    pulse *= amplitude
+
+    return pulse
+
+def fixed_frequency_sine_pulse(length, ecg_frequency, amplitude, frequency, phase, dtype=np.float64, start=0, stop=None):
+    """Sine pulse of fixed frequency
+
+        :NOTE:
+            pulse is rotated by phase from cached waveforms as sin(x + phase) = sin(x)cos(phase) + cos(x)sin(phase),
+            waveforms of parts of the ecg are not cached
+    """
+    dtype = F.get_compute_dtype(dtype)
+    amplitude, phase = expand_pulse_params(amplitude, phase)
+
+    if start == 0 and (stop is None or stop == length):
+        sine, cosine = get_sine_waveforms(length, ecg_frequency, frequency, dtype)
+    else:
+        sine, cosine = compute_sine_waveforms(get_time_points(length, ecg_frequency, start, stop), frequency, dtype)
+
+    pulse = sine * (amplitude * np.cos(phase)).astype(dtype)
+    pulse += cosine * (amplitude * np.sin(phase)).astype(dtype)
+
+    return pulse
+
+def square_pulse(length, ecg_frequency, amplitude, frequency, phase, dtype=np.float64, start=0, stop=None):
+    dtype = F.get_compute_dtype(dtype)
+    amplitude, frequency, phase = expand_pulse_params(amplitude, frequency, phase)
+
+    t = get_time_points(length, ecg_frequency, start, stop)
+
+    pulse = sp.signal.square(2 * np.pi * frequency * t + phase).astype(dtype, copy=False)
+    pulse *= amplitude
+
+    return pulse
+
+def add_sine_pulse(ecg, ecg_frequency, amplitude, frequency, phase, out=None, length=None, start=0):
+    """
+        :NOTE:
+            if length is set, the ecg is treated as the part of the ecg of the length starting at start
+    """
+    stop = start + ecg.shape[F.get_spatial_dim(ecg)]
+    pulse = sine_pulse(length or stop, ecg_frequency, amplitude, frequency, phase, ecg.dtype, start, stop)
+
+    return F.add(ecg, pulse, out=out)
+
+def add_fixed_frequency_sine_pulse(ecg, ecg_frequency, amplitude, frequency, phase, out=None, length=None, start=0):
+    stop = start + ecg.shape[F.get_spatial_dim(ecg)]
+    pulse = fixed_frequency_sine_pulse(length or stop, ecg_frequency, amplitude, frequency, phase, ecg.dtype, start, stop)
+
+    return F.add(ecg, pulse, out=out)
 
-    if len(ecg.shape) == C.NUM_MULTI_CHANNEL_DIMENSIONS:
-        pulse = np.expand_dims(pulse, axis=C.CHANNEL_DIM)
+def add_square_pulse(ecg, ecg_frequency, amplitude, frequency, phase, out=None, length=None, start=0):
+    stop = start + ecg.shape[F.get_spatial_dim(ecg)]
+    pulse = square_pulse(length or stop, ecg_frequency, amplitude, frequency, phase, ecg.dtype, start, stop)
 
-    return np.add(ecg, pulse, dtype=ecg.dtype)
+    return F.add(ecg, pulse, out=out)
@@ -1,5 +1,6 @@
 import numpy as np
 
+import ecgmentations.core.constants as C
 import ecgmentations.augmentations.misc as M
 import ecgmentations.augmentations.pulse.functional as F
 
@@ -43,13 +44,59 @@ class SinePulse(EcgOnlyAugmentation):
 
         self.amplitude_limit = M.prepare_non_negative_float(amplitude_limit, 'amplitude_limit')
 
-    def apply(self, ecg, amplitude, frequency, phase, **params):
-        return F.add_sine_pulse(ecg, self.ecg_frequency, amplitude, frequency, phase)
+    def apply(self, ecg, amplitude, frequency, phase, inplace=False, length=None, start=0, **params):
+        out = ecg if inplace else None
+
+        if self.pulse_frequency_delta == 0:
+            return F.add_fixed_frequency_sine_pulse(
+                ecg, self.ecg_frequency, amplitude, self.pulse_frequency_min, phase, out=out, length=length, start=start
+            )
+        else:
+            return F.add_sine_pulse(ecg, self.ecg_frequency, amplitude, frequency, phase, out=out, length=length, start=start)
+
+    def apply_batch(self, ecg, amplitude, frequency, phase, **params):
+        return self.apply(ecg, amplitude, frequency, phase)
+
+    @property
+    def is_affine(self):
+        return True
+
+    def get_affine_params(self, ecg, amplitude, frequency, phase, **params):
+        length = ecg.shape[C.SPATIAL_DIM]
+
+        if self.pulse_frequency_delta == 0:
+            pulse = F.fixed_frequency_sine_pulse(length, self.ecg_frequency, amplitude, self.pulse_frequency_min, phase, ecg.dtype)
+        else:
+            pulse = F.sine_pulse(length, self.ecg_frequency, amplitude, frequency, phase, ecg.dtype)
+
+        return 1., pulse
+
+    def apply_to_stream(self, chunks, length, **params):
+        start = 0
+
+        for chunk in chunks:
+            yield self.apply(chunk, length=length, start=start, **params)
+
+            start += len(chunk)
+
+    def get_crop_margin(self):
+        """
+            :NOTE:
+                phase is uniformly random, so the pulse of the crop is distributed as the crop of the pulse
+        """
+        return 0
 
     def get_params(self):
-        amplitude = np.random.random() * self.amplitude_limit
-        frequency = np.random.random() * self.pulse_frequency_delta + self.pulse_frequency_min
-        phase = np.random.random() * 2 * np.pi
+        amplitude = self.random_state.random() * self.amplitude_limit
+        frequency = self.random_state.random() * self.pulse_frequency_delta + self.pulse_frequency_min
+        phase = self.random_state.random() * 2 * np.pi
+
+        return {'amplitude': amplitude, 'frequency': frequency, 'phase': phase}
+
+    def get_batch_params(self, batch_size):
+        amplitude = self.random_state.random(batch_size) * self.amplitude_limit
+        frequency = self.random_state.random(batch_size) * self.pulse_frequency_delta + self.pulse_frequency_min
+        phase = self.random_state.random(batch_size) * 2 * np.pi
 
         return {'amplitude': amplitude, 'frequency': frequency, 'phase': phase}
 
@@ -210,13 +257,45 @@ class SquarePulse(EcgOnlyAugmentation):
 
         self.amplitude_limit = M.prepare_non_negative_float(amplitude_limit, 'amplitude_limit')
 
-    def apply(self, ecg, amplitude, frequency, phase, **params):
+    def apply(self, ecg, amplitude, frequency, phase, inplace=False, length=None, start=0, **params):
+        out = ecg if inplace else None
+
+        return F.add_square_pulse(ecg, self.ecg_frequency, amplitude, frequency, phase, out=out, length=length, start=start)
+
+    def apply_batch(self, ecg, amplitude, frequency, phase, **params):
         return F.add_square_pulse(ecg, self.ecg_frequency, amplitude, frequency, phase)
 
+    @property
+    def is_affine(self):
+        return True
+
+    def get_affine_params(self, ecg, amplitude, frequency, phase, **params):
+        length = ecg.shape[C.SPATIAL_DIM]
+
+        return 1., F.square_pulse(length, self.ecg_frequency, amplitude, frequency, phase, ecg.dtype)
+
+    def apply_to_stream(self, chunks, length, **params):
+        start = 0
+
+        for chunk in chunks:
+            yield self.apply(chunk, length=length, start=start, **params)
+
+            start += len(chunk)
+
+    def get_crop_margin(self):
+        return 0
+
     def get_params(self):
-        amplitude = np.random.random() * self.amplitude_limit
-        frequency = np.random.random() * self.pulse_frequency_delta + self.pulse_frequency_min
-        phase = np.random.random() * 2 * np.pi
+        amplitude = self.random_state.random() * self.amplitude_limit
+        frequency = self.random_state.random() * self.pulse_frequency_delta + self.pulse_frequency_min
+        phase = self.random_state.random() * 2 * np.pi
+
+        return {'amplitude': amplitude, 'frequency': frequency, 'phase': phase}
+
+    def get_batch_params(self, batch_size):
+        amplitude = self.random_state.random(batch_size) * self.amplitude_limit
+        frequency = self.random_state.random(batch_size) * self.pulse_frequency_delta + self.pulse_frequency_min
+        phase = self.random_state.random(batch_size) * 2 * np.pi
 
         return {'amplitude': amplitude, 'frequency': frequency, 'phase': phase}
 
@@ -1,7 +1,7 @@
 import numpy as np
 import scipy as sp
 
-from itertools import tee
+from functools import lru_cache
 
 import ecgmentations.core.enum as E
 import ecgmentations.core.constants as C
@@ -14,77 +14,250 @@ def time_reverse(ecg):
 
     return np.require(ecg, requirements=['C_CONTIGUOUS'])
 
-def time_shift(ecg, shift, border_mode, fill_value):
+def map_border_indices(indices, length, border_mode):
+    """Map out of range time indices to time indices of the ecg according to border mode
+
+        :NOTE:
+            out of range indices are clipped for E.BorderType.CONSTANT, they should be filled by caller
+    """
+    mode = C.MAP_BORDER_TYPE_TO_NUMPY[border_mode]
+
+    if mode == 'wrap':
+        indices = np.mod(indices, length)
+    elif mode == 'reflect':
+        period = max(2 * length - 2, 1)
+
+        indices = np.mod(indices, period)
+        indices = np.where(indices < length, indices, period - indices)
+    elif mode == 'symmetric':
+        period = 2 * length
+
+        indices = np.mod(indices, period)
+        indices = np.where(indices < length, indices, period - 1 - indices)
+    else:
+        indices = np.clip(indices, 0, length - 1)
+
+    return indices
+
+def time_shift(ecg, shift, border_mode, fill_value, out=None):
+    """Shift time axis of the ecg or the batch of ecgs
+
+        :NOTE:
+            surviving window is copied once and only exposed border is filled, out can be the ecg itself
+
+        :args:
+            out: np.array or None
+                preallocated array of the ecg shape to write result, if None new array is allocated
+    """
+    if out is None:
+        out = np.empty(ecg.shape, dtype=ecg.dtype)
+
+    if len(ecg.shape) == C.NUM_BATCH_DIMENSIONS:
+        for ecg_, shift_, out_ in zip(ecg, np.broadcast_to(shift, ecg.shape[:C.BATCH_DIM + 1]), out):
+            time_shift(ecg_, shift_, border_mode, fill_value, out=out_)
+
+        return out
+
     length = ecg.shape[C.SPATIAL_DIM]
 
     pad_ = int(length*shift)
+    window = max(length - abs(pad_), 0)
 
     if pad_ > 0:
-        ecg = pad(ecg, pad_, 0, border_mode, fill_value)
-        ecg = ecg[:-pad_]
-    elif pad_ < 0:
-        ecg = pad(ecg, 0, -pad_, border_mode, fill_value)
-        ecg = ecg[-pad_:]
+        border = np.arange(0, length - window)
+    else:
+        border = np.arange(window, length)
 
-    return np.require(ecg, requirements=['C_CONTIGUOUS'])
+    if border_mode == E.BorderType.CONSTANT:
+        values = fill_value
+    else:
+        values = np.take(ecg, map_border_indices(border - pad_, length, border_mode), axis=C.SPATIAL_DIM)
+
+    if pad_ > 0:
+        out[pad_:] = ecg[:window]
+    else:
+        out[:window] = ecg[-pad_:length]
+
+    out[border] = values
+
+    return out
+
+@lru_cache(maxsize=32)
+def get_segment_bounds(length, num_segments):
+    """Get cached time points and borders of segments splitting the ecg as np.array_split does
+    """
+    sizes = np.full(num_segments, length // num_segments)
+    sizes[:length % num_segments] += 1
+
+    time_points = np.arange(length)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    for array in (time_points, starts, sizes):
+        array.setflags(write=False)
+
+    return time_points, starts, sizes
+
+def get_segment_swap_index(length, segment_order):
+    """Get source time point for each time point of the ecg with swapped segments
+
+        :args:
+            segment_order: np.array of shape (num_segments, ) or (batch, num_segments)
+                order of segments for the ecg or each ecg of the batch
+
+        :return:
+            output: np.array of shape (length, ) or (batch, length)
+                indices of time points
+    """
+    segment_order = np.asarray(segment_order)
+    time_points, starts, sizes = get_segment_bounds(length, segment_order.shape[-1])
+
+    sizes = sizes[segment_order]
+    shifts = starts[segment_order] - (np.cumsum(sizes, axis=-1) - sizes)
+
+    return time_points + np.repeat(shifts.ravel(), sizes.ravel()).reshape(segment_order.shape[:-1] + (length, ))
 
 def time_segment_swap(ecg, segment_order):
-    shape = ecg.shape
-    length = shape[C.SPATIAL_DIM]
+    """Swap segments of the ecg or segments of each ecg of the batch
+
+        :args:
+            segment_order: np.array of shape (num_segments, ) or (batch, num_segments)
+                order of segments, for the batch the order is given for each ecg
+    """
+    dim = F.get_spatial_dim(ecg)
+    index = get_segment_swap_index(ecg.shape[dim], segment_order)
+
+    if index.ndim == 1:
+        return np.take(ecg, index, axis=dim)
+
+    batch_size, length = index.shape
+    index = index + np.arange(0, batch_size * length, length)[:, None]
+
+    return np.take(ecg.reshape((batch_size * length, ) + ecg.shape[dim+1:]), index.ravel(), axis=0).reshape(ecg.shape)
+
+def get_wrap_positions(length, cells, ncells):
+    """Get source time position for each time point of the wrapped ecg
+
+        :args:
+            cells: np.array of shape (num_steps + 1, ) or (batch, num_steps + 1)
+                borders of grid cells on the input ecg in fractions of length
+            ncells: np.array of shape (num_steps + 1, ) or (batch, num_steps + 1)
+                borders of grid cells on the wrapped ecg in fractions of length
+
+        :return:
+            output: np.array of shape (length, ) or (batch, length)
+                fractional source time positions
+    """
+    bounds = np.atleast_2d((length * np.asarray(cells)).astype(np.int32))
+    nbounds = np.atleast_2d((length * np.asarray(ncells)).astype(np.int32))
+
+    num_rows, num_bounds = nbounds.shape
+    time_points = np.arange(length)
+
+    # NOTE rows are offset to find cells of all rows by single search in flatten bounds
+    offsets = np.arange(num_rows)[:, None] * (length + 1)
+
+    segments = np.searchsorted((nbounds + offsets).ravel(), (time_points + offsets).ravel(), side='right') - 1
+    segments = segments.reshape(num_rows, length) - np.arange(num_rows)[:, None] * num_bounds
+
+    take = lambda arr: np.take_along_axis(arr, segments, axis=-1)
+
+    left_bound, rigth_bound = take(bounds[:, :-1]), take(bounds[:, 1:])
+    left_nbound, rigth_nbound = take(nbounds[:, :-1]), take(nbounds[:, 1:])
 
-    time_point_order = np.arange(length)
+    scale = (rigth_bound - left_bound - 1) / np.maximum(rigth_nbound - left_nbound - 1, 1)
+    positions = left_bound + (time_points - left_nbound) * scale
 
-    num_segments = len(segment_order)
-    time_point_order = np.array(
-        np.array_split(time_point_order, num_segments)
-    )[segment_order]
+    if len(np.shape(ncells)) == 1:
+        positions = positions[0]
 
-    ecg = ecg[time_point_order]
+    return positions
 
-    if len(shape) == C.NUM_MULTI_CHANNEL_DIMENSIONS:
-        ecg.shape = (length, -1)
+def interpolate(ecg, positions):
+    """Linearly interpolate the ecg or the batch of ecgs at fractional time positions
+    """
+    dim = F.get_spatial_dim(ecg)
+    length = ecg.shape[dim]
+
+    left = np.clip(np.floor(positions).astype(np.int64), 0, max(length - 2, 0))
+    rigth = np.minimum(left + 1, length - 1)
+
+    weights = (positions - left).astype(F.get_compute_dtype(ecg.dtype))
+    weights = weights.reshape(weights.shape + (1, ) * (len(ecg.shape) - len(weights.shape)))
+
+    if len(ecg.shape) == C.NUM_BATCH_DIMENSIONS:
+        gather = lambda indices: np.take_along_axis(ecg, indices[..., None], axis=dim)
     else:
-        ecg.shape = (length, )
+        gather = lambda indices: np.take(ecg, indices, axis=dim)
 
-    return ecg
+    necg = gather(left) * (1 - weights)
+    necg += gather(rigth) * weights
 
-def pairwise(iterable):
-    first, second = tee(iterable)
-    next(second, None)
-    yield from zip(first, second)
+    return necg.astype(ecg.dtype, copy=False)
 
 def time_wrap(ecg, cells, ncells):
-    length = ecg.shape[C.SPATIAL_DIM]
+    length = ecg.shape[F.get_spatial_dim(ecg)]
 
-    bounds = (length * cells).astype(np.int32)
-    nbounds = (length * ncells).astype(np.int32)
+    positions = get_wrap_positions(length, cells, ncells)
 
-    necg = np.zeros_like(ecg)
+    return interpolate(ecg, positions)
 
-    for (left_bound, rigth_bound), (left_nbound, rigth_nbound) in zip(pairwise(bounds), pairwise(nbounds)):
-        necg[left_nbound: rigth_nbound] = np.apply_along_axis(
-            lambda ecg: np.interp(
-                np.linspace(0, 1, rigth_nbound - left_nbound),
-                np.linspace(0, 1, rigth_bound - left_bound),
-                ecg
-            ),
-            axis=C.SPATIAL_DIM,
-            arr=ecg[left_bound: rigth_bound]
-        )
+def get_cutout_index(length, cutouts):
+    """Get indices of cutouted time points expanding run lengths of cutouts
 
-    return necg
+        :NOTE:
+            cost depends on total length of cutouts only, for the batch indices are given in flattened time axis
+            of all ecgs, overlapped cutouts give repeated indices
 
-def time_cutout(ecg, cutouts, fill_value):
-    ecg = np.copy(ecg)
+        :args:
+            cutouts: np.array of shape (num_ranges, 2) or (batch, num_ranges, 2)
+                starts and lengths of cutouts for the ecg or each ecg of the batch
 
-    for cutout_start, cutout_length in cutouts:
-        ecg[cutout_start: cutout_start+cutout_length] = fill_value
+        :return:
+            output: np.array of int
+                indices of time points
+    """
+    cutouts = np.asarray(cutouts, dtype=np.int64)
+    num_rows = int(np.prod(cutouts.shape[:-2]))
 
-    return ecg
+    cutouts = cutouts.reshape(num_rows, -1, 2)
 
-def time_crop(ecg, left_bound, crop_length):
-    length = ecg.shape[C.SPATIAL_DIM]
+    starts = np.clip(cutouts[..., 0], 0, length)
+    lengths = np.clip(cutouts[..., 0] + cutouts[..., 1], 0, length) - starts
+
+    starts = (starts + np.arange(0, num_rows * length, length)[:, None]).ravel()
+    lengths = lengths.ravel()
+
+    offsets = np.cumsum(lengths) - lengths
+
+    return np.arange(np.sum(lengths)) + np.repeat(starts - offsets, lengths)
 
+def time_cutout(ecg, cutouts, fill_value, out=None):
+    """Cutout time ranges of the ecg or the batch of ecgs
+
+        :args:
+            cutouts: np.array of shape (num_ranges, 2) or (batch, num_ranges, 2)
+                starts and lengths of cutouts, for the batch cutouts are given for each ecg
+            out: np.array or None
+                array to write result, if None new array is allocated
+    """
+    dim = F.get_spatial_dim(ecg)
+
+    if out is None:
+        out = np.copy(ecg)
+    elif out is not ecg:
+        out[:] = ecg
+
+    length = ecg.shape[dim]
+    index = get_cutout_index(length, np.reshape(cutouts, ecg.shape[:dim] + (-1, 2)))
+
+    if dim == C.SPATIAL_DIM:
+        out[index] = fill_value
+    else:
+        out[np.divmod(index, length)] = fill_value
+
+    return out
+
+def get_crop_bounds(length, left_bound, crop_length):
     if length < crop_length:
         raise ValueError(
             'Requested crop length {crop_length} is '
@@ -96,45 +269,100 @@ def time_crop(ecg, left_bound, crop_length):
     t1 = int((length - crop_length) * left_bound)
     t2 = t1 + crop_length
 
+    return t1, t2
+
+def time_crop(ecg, left_bound, crop_length):
+    t1, t2 = get_crop_bounds(ecg.shape[C.SPATIAL_DIM], left_bound, crop_length)
+
     return ecg[t1:t2]
 
-def pad(ecg, left_pad, rigth_pad, border_mode, fill_value):
-    kwargs = dict()
+def pad(ecg, left_pad, rigth_pad, border_mode, fill_value, out=None):
+    """Pad time axis of the ecg or the batch of ecgs
 
-    if border_mode == E.BorderType.CONSTANT:
-        kwargs['constant_values'] = fill_value
+        :args:
+            out: np.array or None
+                preallocated array of padded shape to write result, if None new array is allocated
+    """
+    dim = F.get_spatial_dim(ecg)
 
-    func = lambda arr: np.pad(
-        arr,
-        pad_width=(left_pad, rigth_pad),
-        mode=C.MAP_BORDER_TYPE_TO_NUMPY[border_mode],
-        **kwargs
-    )
+    if out is None:
+        kwargs = dict()
 
-    if len(ecg.shape) == C.NUM_MULTI_CHANNEL_DIMENSIONS:
-        ecg = F.apply_along_dim(ecg, func, C.CHANNEL_DIM)
-    else:
-        ecg = func(ecg)
+        if border_mode == E.BorderType.CONSTANT:
+            kwargs['constant_values'] = fill_value
+
+        pad_width = [(0, 0)] * len(ecg.shape)
+        pad_width[dim] = (left_pad, rigth_pad)
+
+        return np.pad(ecg, pad_width=pad_width, mode=C.MAP_BORDER_TYPE_TO_NUMPY[border_mode], **kwargs)
+
+    length = ecg.shape[dim]
+
+    if out.shape[dim] != left_pad + length + rigth_pad:
+        raise ValueError(
+            'Output length {} does not match padded length {}'.format(out.shape[dim], left_pad + length + rigth_pad)
+        )
+
+    out[F.get_spatial_index(out, slice(left_pad, left_pad + length))] = ecg
+
+    for start, stop in ((0, left_pad), (left_pad + length, left_pad + length + rigth_pad)):
+        if start == stop:
+            continue
+
+        border = F.get_spatial_index(out, slice(start, stop))
+
+        if border_mode == E.BorderType.CONSTANT:
+            out[border] = fill_value
+        else:
+            indices = map_border_indices(np.arange(start - left_pad, stop - left_pad), length, border_mode)
+            out[border] = np.take(ecg, indices, axis=dim)
 
-    return ecg
+    return out
+
+def median_filter(ecg, kernel_size, border_mode, fill_value):
+    """Median filter of all channels of the ecg or the batch of ecgs along time axis
+
+        :NOTE:
+            channels are padded and concatenated to one signal, so the sorted window filter of scipy for 1d signals
+            is applied once with cost logarithmic in kernel size, padding keeps windows within own channels
+    """
+    dim = F.get_spatial_dim(ecg)
+    pad_width = kernel_size // 2
+
+    padded = np.moveaxis(pad(ecg, pad_width, pad_width, border_mode, fill_value), dim, -1)
+    shape = padded.shape
+
+    padded = sp.ndimage.median_filter(np.ascontiguousarray(padded).ravel(), size=kernel_size)
+    padded = padded.reshape(shape)[..., pad_width:shape[-1]-pad_width]
+
+    return np.ascontiguousarray(np.moveaxis(padded, -1, dim))
 
 def pooling(ecg, reduction, kernel_size, border_mode, fill_value):
+    """Reduce all channels of the ecg or the batch of ecgs in sliding window along time axis
+
+        :NOTE:
+            minimum, maximum and mean are computed by running filters of scipy with cost independent of kernel size
+    """
     if reduction == E.ReductionType.MIN:
-        filter = sp.ndimage.minimum_filter
+        filter = sp.ndimage.minimum_filter1d
     elif reduction == E.ReductionType.MEAN:
-        filter = sp.ndimage.uniform_filter
+        filter = sp.ndimage.uniform_filter1d
     elif reduction == E.ReductionType.MAX:
-        filter = sp.ndimage.maximum_filter
+        filter = sp.ndimage.maximum_filter1d
     elif reduction == E.ReductionType.MEDIAN:
-        filter = sp.ndimage.median_filter
+        filter = None
     else:
         raise ValueError('Get invalide reduction: {}'.format(reduction))
 
-    pad_width = kernel_size // 2
+    dtype = ecg.dtype
 
-    ecg = pad(ecg, pad_width, pad_width, border_mode, fill_value)
-    ecg = filter(ecg, size=kernel_size)
+    if dtype == np.float16:
+        ecg = ecg.astype(np.float32)
 
-    ecg = ecg[pad_width:-pad_width]
+    if filter is None:
+        ecg = median_filter(ecg, kernel_size, border_mode, fill_value)
+    else:
+        mode = C.MAP_BORDER_TYPE_TO_SC[border_mode]
+        ecg = filter(ecg, kernel_size, axis=F.get_spatial_dim(ecg), mode=mode, cval=fill_value)
 
-    return ecg
+    return ecg.astype(dtype, copy=False)
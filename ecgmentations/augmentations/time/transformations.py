@@ -6,6 +6,7 @@ import ecgmentations.augmentations.misc as M
 import ecgmentations.augmentations.time.functional as F
 
 from ecgmentations.core.augmentation import EcgOnlyAugmentation, DualAugmentation
+from ecgmentations.core.utils import load_array
 
 class TimeReverse(DualAugmentation):
     """Reverse the input ecg.
@@ -47,14 +48,25 @@ class TimeShift(DualAugmentation):
         self.fill_value = M.prepare_float(fill_value, 'fill_value')
         self.mask_fill_value = M.prepare_int(mask_fill_value, 'mask_fill_value')
 
-    def apply(self, ecg, shift, **params):
+    def apply(self, ecg, shift, inplace=False, **params):
+        return F.time_shift(ecg, shift, self.border_mode, self.fill_value, out=ecg if inplace else None)
+
+    def apply_to_mask(self, mask, shift, inplace=False, **params):
+        return F.time_shift(mask, shift, self.border_mode, self.mask_fill_value, out=mask if inplace else None)
+
+    def apply_batch(self, ecg, shift, **params):
         return F.time_shift(ecg, shift, self.border_mode, self.fill_value)
 
-    def apply_to_mask(self, mask, shift, **params):
+    def apply_batch_to_mask(self, mask, shift, **params):
         return F.time_shift(mask, shift, self.border_mode, self.mask_fill_value)
 
     def get_params(self):
-        shift = (2 * np.random.random() - 1) * self.shift_limit
+        shift = (2 * self.random_state.random() - 1) * self.shift_limit
+
+        return {'shift': shift}
+
+    def get_batch_params(self, batch_size):
+        shift = (2 * self.random_state.random(batch_size) - 1) * self.shift_limit
 
         return {'shift': shift}
 
@@ -82,12 +94,23 @@ class TimeSegmentShuffle(DualAugmentation):
     def apply(self, ecg, segment_order, **params):
         return F.time_segment_swap(ecg, segment_order)
 
+    def apply_batch(self, ecg, segment_order, **params):
+        return F.time_segment_swap(ecg, segment_order)
+
+    def apply_batch_to_mask(self, mask, segment_order, **params):
+        return F.time_segment_swap(mask, segment_order)
+
     def get_params(self):
         segment_order = np.arange(self.num_segments)
-        np.random.shuffle(segment_order)
+        self.random_state.shuffle(segment_order)
 
         return {'segment_order': segment_order}
 
+    def get_batch_params(self, batch_size):
+        segment_order = np.broadcast_to(np.arange(self.num_segments), (batch_size, self.num_segments))
+
+        return {'segment_order': self.random_state.permuted(segment_order, axis=1)}
+
     def get_transform_init_args_names(self):
         return ('num_segments', )
 
@@ -116,18 +139,36 @@ class RandomTimeWrap(DualAugmentation):
     def apply(self, ecg, cells, ncells, **params):
         return F.time_wrap(ecg, cells, ncells)
 
+    def apply_batch(self, ecg, cells, ncells, **params):
+        return F.time_wrap(ecg, cells, ncells)
+
+    def apply_batch_to_mask(self, mask, cells, ncells, **params):
+        return F.time_wrap(mask, cells, ncells)
+
     def get_params(self):
         cells = np.linspace(0, 1, self.num_steps + 1)
         ncells = np.linspace(0, 1, self.num_steps + 1)
 
         if self.num_steps > 1:
-            directions = np.random.choice([-1, 1], size=self.num_steps - 1)
-            shifts = np.random.random(size=self.num_steps-1) * self.wrap_limit * 0.5
+            directions = self.random_state.choice([-1, 1], size=self.num_steps - 1)
+            shifts = self.random_state.random(size=self.num_steps-1) * self.wrap_limit * 0.5
 
             ncells[1:-1] += shifts * directions / (self.num_steps + 1)
 
         return {'cells': cells, 'ncells': ncells}
 
+    def get_batch_params(self, batch_size):
+        cells = np.tile(np.linspace(0, 1, self.num_steps + 1), (batch_size, 1))
+        ncells = np.copy(cells)
+
+        if self.num_steps > 1:
+            directions = self.random_state.choice([-1, 1], size=(batch_size, self.num_steps - 1))
+            shifts = self.random_state.random(size=(batch_size, self.num_steps - 1)) * self.wrap_limit * 0.5
+
+            ncells[:, 1:-1] += shifts * directions / (self.num_steps + 1)
+
+        return {'cells': cells, 'ncells': ncells}
+
     def get_transform_init_args_names(self):
         return ('num_steps', 'wrap_limit')
 
@@ -169,14 +210,20 @@ class TimeCutout(DualAugmentation):
         self.fill_value = M.prepare_float(fill_value, 'fill_value')
         self.mask_fill_value = mask_fill_value
 
-    def apply(self, ecg, cutouts, **params):
-        return F.time_cutout(ecg, cutouts, self.fill_value)
+    def apply(self, ecg, cutouts, inplace=False, **params):
+        return F.time_cutout(ecg, cutouts, self.fill_value, out=ecg if inplace else None)
 
-    def apply_to_mask(self, mask, cutouts, **params):
+    def apply_to_mask(self, mask, cutouts, inplace=False, **params):
         if self.mask_fill_value is None:
             return mask
         else:
-            return F.time_cutout(mask, cutouts, self.mask_fill_value)
+            return F.time_cutout(mask, cutouts, self.mask_fill_value, out=mask if inplace else None)
+
+    def apply_batch(self, ecg, cutouts, **params):
+        return F.time_cutout(ecg, cutouts, self.fill_value)
+
+    def apply_batch_to_mask(self, mask, cutouts, **params):
+        return self.apply_to_mask(mask, cutouts)
 
     @property
     def targets_as_params(self):
@@ -185,13 +232,40 @@ class TimeCutout(DualAugmentation):
     def get_params_dependent_on_targets(self, params):
         length = params['ecg'].shape[C.SPATIAL_DIM]
 
-        cutouts = []
+        num_ranges = self.random_state.integers(self.min_num_ranges, self.max_num_ranges + 1)
+
+        cutout_lengths = self.random_state.integers(self.min_length_range, self.max_length_range + 1, size=num_ranges)
+        cutout_starts = (self.random_state.random(num_ranges) * (length - cutout_lengths + 1)).astype(np.int64)
 
-        for _ in range(np.random.randint(self.min_num_ranges, self.max_num_ranges + 1)):
-            cutout_length = np.random.randint(self.min_length_range, self.max_length_range + 1)
-            cutout_start = np.random.randint(0, length - cutout_length + 1)
+        return {'cutouts': np.stack([cutout_starts, cutout_lengths], axis=-1)}
 
-            cutouts.append((cutout_start, cutout_length))
+    def apply_to_stream(self, chunks, length, cutouts, **params):
+        start = 0
+
+        cutout_starts = cutouts[:, 0]
+        cutout_stops = cutout_starts + cutouts[:, 1]
+
+        for chunk in chunks:
+            chunk_starts = np.clip(cutout_starts - start, 0, len(chunk))
+            chunk_stops = np.clip(cutout_stops - start, 0, len(chunk))
+
+            yield self.apply(chunk, np.stack([chunk_starts, chunk_stops - chunk_starts], axis=-1))
+
+            start += len(chunk)
+
+    def get_batch_params_dependent_on_targets(self, params):
+        batch_size, length = params['ecg'].shape[:C.BATCH_CHANNEL_DIM]
+
+        num_ranges = self.random_state.integers(self.min_num_ranges, self.max_num_ranges + 1, size=(batch_size, 1))
+
+        cutout_lengths = self.random_state.integers(
+            self.min_length_range, self.max_length_range + 1, size=(batch_size, self.max_num_ranges)
+        )
+        cutout_lengths[np.arange(self.max_num_ranges) >= num_ranges] = 0
+
+        cutout_starts = (self.random_state.random(cutout_lengths.shape) * (length - cutout_lengths + 1)).astype(np.int64)
+
+        cutouts = np.stack([cutout_starts, cutout_lengths], axis=-1)
 
         return {'cutouts': cutouts}
 
@@ -221,7 +295,22 @@ class TimeCrop(DualAugmentation):
         self.position = E.PositionType(position)
 
     def apply(self, ecg, left_bound, **params):
-        return F.time_crop(ecg, left_bound, self.length)
+        return load_array(F.time_crop(ecg, left_bound, self.length))
+
+    @property
+    def supports_lazy_input(self):
+        """
+            :NOTE:
+                only cropped time segment of lazy input is read to memory
+        """
+        return True
+
+    @property
+    def is_time_crop(self):
+        return True
+
+    def get_time_bounds(self, length, left_bound, **params):
+        return F.get_crop_bounds(length, left_bound, self.length)
 
     def get_params(self):
         if self.position == E.PositionType.LEFT:
@@ -231,7 +320,7 @@ class TimeCrop(DualAugmentation):
         elif self.position == E.PositionType.RIGHT:
             left_bound = 1.0
         else:
-            left_bound = np.random.random()
+            left_bound = self.random_state.random()
 
         return {'left_bound': left_bound}
 
@@ -336,7 +425,7 @@ class TimePadIfNeeded(DualAugmentation):
             left_pad = pad_length
             rigth_pad = 0
         else:
-            left_pad = np.random.randint(0, pad_length + 1)
+            left_pad = self.random_state.integers(0, pad_length + 1)
             rigth_pad = pad_length - left_pad
 
         return {'left_pad': left_pad, 'rigth_pad': rigth_pad}
@@ -376,11 +465,31 @@ class Pooling(EcgOnlyAugmentation):
     def apply(self, ecg, kernel_size, **params):
         return F.pooling(ecg, self.reduction, kernel_size, E.BorderType.CONSTANT, 0)
 
+    def apply_batch(self, ecg, kernel_size, **params):
+        necg = np.empty_like(ecg)
+
+        for size in np.unique(kernel_size):
+            indices = kernel_size == size
+            necg[indices] = F.pooling(ecg[indices], self.reduction, size, E.BorderType.CONSTANT, 0)
+
+        return necg
+
     def get_params(self):
-        kernel_size = 2 * np.random.randint(self.min_kernel_size // 2, self.max_kernel_size // 2 + 1) + 1
+        kernel_size = 2 * self.random_state.integers(self.min_kernel_size // 2, self.max_kernel_size // 2 + 1) + 1
+
+        return {'kernel_size': kernel_size}
+
+    def get_batch_params(self, batch_size):
+        kernel_size = 2 * self.random_state.integers(self.min_kernel_size // 2, self.max_kernel_size // 2 + 1, size=batch_size) + 1
 
         return {'kernel_size': kernel_size}
 
+    def get_time_margin(self, kernel_size, **params):
+        return kernel_size // 2
+
+    def get_crop_margin(self):
+        return self.max_kernel_size // 2
+
     def get_transform_init_args_names(self):
         return ('reduction', 'kernel_size_range')
 
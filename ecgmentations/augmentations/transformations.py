@@ -11,9 +11,25 @@ from ecgmentations.core.augmentation import EcgOnlyAugmentation, DualAugmentatio
 class AmplitudeInvert(EcgOnlyAugmentation):
     """Invert the input ecg.
     """
-    def apply(self, ecg, **params):
+    def apply(self, ecg, inplace=False, **params):
+        return F.amplitude_invert(ecg, out=ecg if inplace else None)
+
+    def apply_batch(self, ecg, **params):
         return F.amplitude_invert(ecg)
 
+    @property
+    def is_affine(self):
+        return True
+
+    def get_affine_params(self, ecg, **params):
+        return -1., None
+
+    def get_time_margin(self, **params):
+        return 0
+
+    def get_crop_margin(self):
+        return 0
+
     def get_transform_init_args_names(self):
         return tuple()
 
@@ -32,10 +48,16 @@ class ChannelShuffle(EcgOnlyAugmentation):
             raise RuntimeError('Ecg has implicit channel. ChannelShuffle is not defined.')
 
         channel_order = np.arange(params['ecg'].shape[C.CHANNEL_DIM])
-        np.random.shuffle(channel_order)
+        self.random_state.shuffle(channel_order)
 
         return {'channel_order': channel_order}
 
+    def get_time_margin(self, **params):
+        return 0
+
+    def get_crop_margin(self):
+        return 0
+
     def get_transform_init_args_names(self):
         return ()
 
@@ -65,8 +87,8 @@ class ChannelDropout(EcgOnlyAugmentation):
 
         self.fill_value = M.prepare_float(fill_value, 'fill_value')
 
-    def apply(self, ecg, channels_to_drop, **params):
-        return F.channel_dropout(ecg, channels_to_drop, self.fill_value)
+    def apply(self, ecg, channels_to_drop, inplace=False, **params):
+        return F.channel_dropout(ecg, channels_to_drop, self.fill_value, out=ecg if inplace else None)
 
     @property
     def targets_as_params(self):
@@ -84,11 +106,17 @@ class ChannelDropout(EcgOnlyAugmentation):
         if not ( self.max_drop_channels < num_channels ):
             raise ValueError('Can not drop all channels in ChannelDropout.')
 
-        num_drop_channels = np.random.randint(low=self.min_drop_channels, high=self.max_drop_channels + 1)
-        channels_to_drop = np.random.choice(num_channels, size=num_drop_channels)
+        num_drop_channels = self.random_state.integers(low=self.min_drop_channels, high=self.max_drop_channels + 1)
+        channels_to_drop = self.random_state.choice(num_channels, size=num_drop_channels)
 
         return {'channels_to_drop': channels_to_drop}
 
+    def get_time_margin(self, **params):
+        return 0
+
+    def get_crop_margin(self):
+        return 0
+
     def get_transform_init_args_names(self):
         return ('channel_drop_range', 'fill_value')
 
@@ -123,9 +151,19 @@ class GaussNoise(EcgOnlyAugmentation):
         self.variance = M.prepare_non_negative_float(variance, 'variance')
         self.per_channel = per_channel
 
-    def apply(self, ecg, gauss, **params):
+    def apply(self, ecg, gauss, inplace=False, **params):
+        return F.add(ecg, gauss, out=ecg if inplace else None)
+
+    def apply_batch(self, ecg, gauss, **params):
         return F.add(ecg, gauss)
 
+    @property
+    def is_affine(self):
+        return True
+
+    def get_affine_params(self, ecg, gauss, **params):
+        return 1., gauss
+
     @property
     def targets_as_params(self):
         return ['ecg']
@@ -136,9 +174,46 @@ class GaussNoise(EcgOnlyAugmentation):
         else:
             shape = params['ecg'].shape[:C.NUM_SPATIAL_DIMENSIONS]
 
-        gauss = np.random.normal(self.mean, self.variance**0.5, shape)
+        return {'gauss': self.get_gauss(shape, params['ecg'].dtype)}
+
+    def get_stream_params(self, template):
+        return self.get_params()
+
+    def get_crop_margin(self):
+        return 0
+
+    def apply_to_stream(self, chunks, length, **params):
+        """
+            :NOTE:
+                noise is drawn chunk by chunk, so it is the same as noise drawn for the whole ecg
+        """
+        for chunk in chunks:
+            if self.per_channel and len(chunk.shape) == C.NUM_MULTI_CHANNEL_DIMENSIONS:
+                shape = chunk.shape
+            else:
+                shape = chunk.shape[:C.NUM_SPATIAL_DIMENSIONS]
+
+            yield F.add(chunk, self.get_gauss(shape, chunk.dtype))
+
+    def get_batch_params_dependent_on_targets(self, params):
+        if self.per_channel:
+            shape = params['ecg'].shape
+        else:
+            shape = params['ecg'].shape[:C.BATCH_CHANNEL_DIM]
 
-        return {'gauss': gauss}
+        return {'gauss': self.get_gauss(shape, params['ecg'].dtype)}
+
+    def get_gauss(self, shape, dtype):
+        """
+            :NOTE:
+                noise is drawn in compute type of the ecg
+        """
+        gauss = self.random_state.standard_normal(shape, dtype=F.get_compute_dtype(dtype))
+
+        gauss *= self.variance**0.5
+        gauss += self.mean
+
+        return gauss
 
     def get_transform_init_args_names(self):
         return ('mean', 'variance', 'per_channel')
@@ -181,13 +256,36 @@ class GaussBlur(EcgOnlyAugmentation):
     def apply(self, ecg, kernel, **params):
         return F.conv(ecg, kernel, E.BorderType.CONSTANT, 0)
 
-    def get_params(self):
-        kernel_size = 2 * np.random.randint(self.min_kernel_size // 2, self.max_kernel_size // 2 + 1) + 1
+    def apply_batch(self, ecg, kernel_size, **params):
+        necg = np.empty_like(ecg)
 
+        for size in np.unique(kernel_size):
+            indices = kernel_size == size
+            necg[indices] = F.conv(ecg[indices], self.get_kernel(size), E.BorderType.CONSTANT, 0)
+
+        return necg
+
+    def get_kernel(self, kernel_size):
         kernel = np.exp(-0.5 * np.square(np.arange(-kernel_size, kernel_size+1)) / self.variance)
         kernel = kernel / np.sum(kernel)
 
-        return {'kernel': kernel}
+        return kernel
+
+    def get_params(self):
+        kernel_size = 2 * self.random_state.integers(self.min_kernel_size // 2, self.max_kernel_size // 2 + 1) + 1
+
+        return {'kernel': self.get_kernel(kernel_size)}
+
+    def get_time_margin(self, kernel, **params):
+        return kernel.size // 2
+
+    def get_crop_margin(self):
+        return self.max_kernel_size
+
+    def get_batch_params(self, batch_size):
+        kernel_size = 2 * self.random_state.integers(self.min_kernel_size // 2, self.max_kernel_size // 2 + 1, size=batch_size) + 1
+
+        return {'kernel_size': kernel_size}
 
     def get_transform_init_args_names(self):
         return ('variance', 'kernel_size_range')
@@ -213,11 +311,32 @@ class AmplitudeScale(EcgOnlyAugmentation):
         self.min_scaling_range = self.scaling_range[0]
         self.max_scaling_range = self.scaling_range[1]
 
-    def apply(self, ecg, scaling_factor, **params):
-        return F.multiply(ecg, scaling_factor)
+    def apply(self, ecg, scaling_factor, inplace=False, **params):
+        return F.multiply(ecg, scaling_factor, out=ecg if inplace else None)
+
+    def apply_batch(self, ecg, scaling_factor, **params):
+        return F.multiply(ecg, np.reshape(scaling_factor, (-1, 1, 1)))
+
+    @property
+    def is_affine(self):
+        return True
+
+    def get_affine_params(self, ecg, scaling_factor, **params):
+        return scaling_factor, None
+
+    def get_time_margin(self, **params):
+        return 0
+
+    def get_crop_margin(self):
+        return 0
 
     def get_params(self):
-        scaling_factor = 1 + np.random.uniform(self.min_scaling_range, self.max_scaling_range)
+        scaling_factor = 1 + self.random_state.uniform(self.min_scaling_range, self.max_scaling_range)
+
+        return {'scaling_factor': scaling_factor}
+
+    def get_batch_params(self, batch_size):
+        scaling_factor = 1 + self.random_state.uniform(self.min_scaling_range, self.max_scaling_range, size=batch_size)
 
         return {'scaling_factor': scaling_factor}
 
@@ -1,4 +1,4 @@
 from ecgmentations.core.augmentation import EcgOnlyAugmentation, DualAugmentation, Identity
-from ecgmentations.core.composition import Sequential, NonSequential, OneOf
+from ecgmentations.core.composition import Sequential, NonSequential, OneOf, FusedSequential, CropFirstSequential
 from ecgmentations.core.modification import ToChannels
-from ecgmentations.core.enum import BorderType, PositionType, ReductionType
\ No newline at end of file
+from ecgmentations.core.enum import BorderType, PositionType, ReductionType, FilterMode
\ No newline at end of file
@@ -1,8 +1,19 @@
 import cv2
 import numpy as np
 
+from functools import partial
+
 from ecgmentations.core.transformation import Transformation
-from ecgmentations.core.utils import format_args
+from ecgmentations.core.utils import format_args, get_batch_size, collate_params, apply_to_batch_subset, \
+    apply_to_chunks_with_margin
+
+def get_unbound_function(instance, func):
+    """Convert method bound to the instance to function taking the instance as the first argument
+    """
+    if getattr(func, '__self__', None) is instance:
+        return func.__func__
+
+    return lambda _, datum, **params: func(datum, **params)
 
 class Augmentation(Transformation):
     """Root class for single augmentations
@@ -17,11 +28,15 @@ class Augmentation(Transformation):
         """
         super(Augmentation, self).__init__(always_apply, p)
 
-    def __call__(self, *args, force_apply=False, **data):
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
         """
             :args:
                 force_apply: bool
                     the flag of force application
+                batched: bool
+                    if set to True, data is batch of shape (batch, length, channels)
+                inplace: bool
+                    if set to True, data is owned by the caller pipeline and can be overwritten
                 data: dict
                     the data to make a transformation
 
@@ -31,38 +46,101 @@ class Augmentation(Transformation):
         if args:
             raise KeyError('You have to pass data to augmentations as named arguments, for example: aug(ecg=ecg)')
 
-        if self.whether_apply(force_apply):
-            params = self.get_params()
+        if batched:
+            applied = self.whether_apply_batch(force_apply, get_batch_size(data))
 
-            if self.targets_as_params:
-                assert all(name in data for name in self.targets_as_params), '{} requires {}'.format(
-                    self.get_class_name(), self.targets_as_params
-                )
+            return apply_to_batch_subset(self._apply_to_batch, applied, **data)
 
-                targets_as_params = {name: data[name] for name in self.targets_as_params}
+        if not self.whether_apply(force_apply):
+            return data
 
-                params_dependent_on_targets = self.get_params_dependent_on_targets(targets_as_params)
-                params.update(params_dependent_on_targets)
+        params = self.sample_params(**data)
 
-            return self.apply_with_params(params, **data)
+        if params is None:
+            return data
 
-        return data
+        if inplace:
+            params['inplace'] = True
+
+        return self._apply_to_targets(params, data)
+
+    def sample_params(self, **data):
+        """
+            :return:
+                output: dict
+                    parameters of application including parameters dependent on targets
+        """
+        params = self.get_params()
+
+        if self.targets_as_params:
+            assert all(name in data for name in self.targets_as_params), '{} requires {}'.format(
+                self.get_class_name(), self.targets_as_params
+            )
+
+            targets_as_params = {name: data[name] for name in self.targets_as_params}
+
+            params_dependent_on_targets = self.get_params_dependent_on_targets(targets_as_params)
+            params.update(params_dependent_on_targets)
+
+        return params
 
     def apply_with_params(self, params, **data):
         if params is None:
             return data
 
+        return self._apply_to_targets(params, data)
+
+    def _apply_to_targets(self, params, data):
+        """Apply target functions to data updating it in place
+
+            :NOTE:
+                data is expected to be a dict owned by the caller, for example, built from named arguments
+        """
+        for name, target_function in self._get_target_table().items():
+            datum = data.get(name)
+
+            if datum is not None:
+                data[name] = target_function(self, datum, **params)
+
+        return data
+
+    def _apply_to_batch(self, **data):
+        params = self.get_batch_params(get_batch_size(data))
+
+        if self.targets_as_params:
+            assert all(name in data for name in self.targets_as_params), '{} requires {}'.format(
+                self.get_class_name(), self.targets_as_params
+            )
+
+            targets_as_params = {name: data[name] for name in self.targets_as_params}
+
+            params_dependent_on_targets = self.get_batch_params_dependent_on_targets(targets_as_params)
+            params.update(params_dependent_on_targets)
+
+        return self.apply_batch_with_params(params, **data)
+
+    def apply_batch_with_params(self, params, **data):
+        if params is None:
+            return data
+
         pdata = {}
 
         for name, datum in data.items():
             if datum is not None:
-                target_function = self._get_target_function(name)
+                target_function = self._get_batch_target_function(name)
                 pdata[name] = target_function(datum, **params)
             else:
                 pdata[name] = None
 
         return pdata
 
+    def _apply_along_batch(self, func, data, params):
+        """Apply single sample function to each sample of the batch
+        """
+        return np.stack([
+            func(datum, **{k: v[idx] for k, v in params.items()}) for idx, datum in enumerate(data)
+        ])
+
     def __repr__(self):
         state = self.get_base_init_args()
         state.update(self.get_transform_init_args())
@@ -76,9 +154,139 @@ class Augmentation(Transformation):
         target_function = self.targets.get(name, lambda x, **p: x)
         return target_function
 
+    def _get_target_table(self):
+        """
+            :NOTE:
+                targets are cached per instance as plain functions taking the instance as the first argument,
+                so copies of the instance do not call methods of the original one
+
+            :return:
+                output: dict
+                    functions to apply to each target
+        """
+        table = self.__dict__.get('_target_table')
+
+        if table is None:
+            table = {name: get_unbound_function(self, func) for name, func in self.targets.items()}
+            self._target_table = table
+
+        return table
+
+    def _get_batch_target_function(self, name):
+        target_function = self.batch_targets.get(name, lambda x, **p: x)
+        return target_function
+
     def get_params(self):
         return {}
 
+    @property
+    def is_affine(self):
+        """
+            :NOTE:
+                affine augmentations implement get_affine_params and can be fused by Sequential.compile
+        """
+        return False
+
+    def get_affine_params(self, ecg, **params):
+        """
+            :return:
+                output: (float, np.array or None)
+                    scale and offset such that application equals to scale * ecg + offset
+        """
+        raise NotImplementedError(
+            'Method get_affine_params is not implemented in class {}'.format(self.get_class_name())
+        )
+
+    @property
+    def is_time_crop(self):
+        """
+            :NOTE:
+                time crops implement get_time_bounds and can be moved before transformations by Sequential.compile
+        """
+        return False
+
+    def get_time_bounds(self, length, **params):
+        """
+            :return:
+                output: (int, int)
+                    start and stop of the cropped time segment of the ecg of the length
+        """
+        raise NotImplementedError(
+            'Method get_time_bounds is not implemented in class {}'.format(self.get_class_name())
+        )
+
+    def check_streaming(self):
+        """
+            :NOTE:
+                augmentations support streaming if they define time margin or own application to stream
+        """
+        cls = type(self)
+
+        if cls.get_time_margin is Augmentation.get_time_margin and cls.apply_to_stream is Augmentation.apply_to_stream:
+            super(Augmentation, self).check_streaming()
+
+    def _stream(self, chunks, template, force_apply=False):
+        if not self.whether_apply(force_apply):
+            return chunks
+
+        params = self.get_stream_params(template)
+
+        return self.apply_to_stream(chunks, len(template), **params)
+
+    def get_stream_params(self, template):
+        """
+            :NOTE:
+                override if parameters dependent on targets are as large as the ecg
+        """
+        return self.sample_params(ecg=template)
+
+    def apply_to_stream(self, chunks, length, **params):
+        """
+            :NOTE:
+                by default time local augmentations are applied to chunks with overlap of time margin,
+                override for augmentations dependent on position in the ecg
+
+            :args:
+                chunks: iterable of np.array
+                    consecutive parts of the ecg
+                length: int
+                    length of the whole ecg
+
+            :return:
+                output: generator
+                    transformed chunks of the ecg
+        """
+        margin = self.get_time_margin(**params)
+
+        if margin is None:
+            raise NotImplementedError(
+                'Class {} does not support streaming'.format(self.get_class_name())
+            )
+
+        if margin == 0:
+            return (self.apply(chunk, **params) for chunk in chunks)
+
+        return apply_to_chunks_with_margin(chunks, margin, partial(self.apply, **params))
+
+    def get_time_margin(self, **params):
+        """
+            :return:
+                output: int or None
+                    number of samples on each side that output sample depends on with zero padding on borders,
+                    None if output is not defined by neighborhood of the sample
+        """
+        return None
+
+    def get_batch_params(self, batch_size):
+        """
+            :NOTE:
+                by default parameters are sampled for each sample independently, override to sample them as arrays
+        """
+        return collate_params([self.get_params() for _ in range(batch_size)])
+
+    def apply_batch(self, ecg, **params):
+        return self._apply_along_batch(self.apply, ecg, params)
+
     @property
     def targets(self):
         """
@@ -89,6 +297,14 @@ class Augmentation(Transformation):
         """
         raise NotImplementedError
 
+    @property
+    def batch_targets(self):
+        """
+            :NOTE:
+                batch counterpart of targets
+        """
+        raise NotImplementedError
+
     @property
     def targets_as_params(self):
         return []
@@ -98,6 +314,13 @@ class Augmentation(Transformation):
             'Method get_params_dependent_on_targets is not implemented in class {}'.format(self.get_class_name())
         )
 
+    def get_batch_params_dependent_on_targets(self, params):
+        batch_size = len(next(iter(params.values())))
+
+        return collate_params([
+            self.get_params_dependent_on_targets({k: v[idx] for k, v in params.items()}) for idx in range(batch_size)
+        ])
+
     def get_transform_init_args_names(self):
         raise NotImplementedError(
             'Class {} is not serializable because the `get_transform_init_args_names` method is not '
@@ -117,6 +340,10 @@ class EcgOnlyAugmentation(Augmentation):
     def targets(self):
         return { 'ecg': self.apply }
 
+    @property
+    def batch_targets(self):
+        return { 'ecg': self.apply_batch }
+
 class DualAugmentation(Augmentation):
     """Augmentation for segmentation task
     """
@@ -127,14 +354,30 @@ class DualAugmentation(Augmentation):
             'mask': self.apply_to_mask,
         }
 
+    @property
+    def batch_targets(self):
+        return {
+            'ecg': self.apply_batch,
+            'mask': self.apply_batch_to_mask,
+        }
+
     def apply_to_mask(self, mask, **params):
         return self.apply(mask, **{k: cv2.INTER_NEAREST if k == 'interpolation' else v for k, v in params.items()})
 
+    def apply_batch_to_mask(self, mask, **params):
+        return self._apply_along_batch(self.apply_to_mask, mask, params)
+
 class Identity(DualAugmentation):
     """Identity transform
     """
     def apply(self, ecg, **params):
         return ecg
 
+    def get_time_margin(self, **params):
+        return 0
+
+    def get_crop_margin(self):
+        return 0
+
     def get_transform_init_args_names(self):
         return tuple()
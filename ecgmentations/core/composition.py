@@ -1,7 +1,13 @@
+import copy
 import numpy as np
 
+from functools import partial
+
 from ecgmentations.core.transformation import Transformation
-from ecgmentations.core.utils import format_args, get_shortest_class_fullname
+from ecgmentations.core.profiling import format_statistics
+from ecgmentations.core.utils import format_args, get_shortest_class_fullname, get_batch_size, apply_to_batch_subset, \
+    spawn_random_states, copy_data, load_data, load_array, has_lazy_data
+import ecgmentations.core.constants as C
 
 class Composition(Transformation):
     def __init__(self, transforms, always_apply, p):
@@ -29,6 +35,63 @@ class Composition(Transformation):
 
         self.transformations = transforms
 
+    def set_random_state(self, random_state):
+        """
+            :NOTE:
+                generator is shared by all nested transformations, otherwise independent generators are spawned for them
+        """
+        random_states = spawn_random_states(random_state, len(self.transformations) + 1)
+
+        super(Composition, self).set_random_state(random_states[0])
+
+        for t, t_random_state in zip(self.transformations, random_states[1:]):
+            t.set_random_state(t_random_state)
+
+        return self
+
+    def compile(self, **kwargs):
+        """
+            :NOTE:
+                nested transformations are compiled with the same options,
+                the transformations themselves are shared with the original composition
+        """
+        compiled = copy.copy(self)
+        compiled.transformations = [t.compile(**kwargs) for t in self.transformations]
+
+        return compiled
+
+    def check_streaming(self):
+        for t in self.transformations:
+            t.check_streaming()
+
+    def enable_stats(self, window=10000):
+        super(Composition, self).enable_stats(window)
+
+        for t in self.transformations:
+            t.enable_stats(window)
+
+        return self
+
+    def disable_stats(self):
+        super(Composition, self).disable_stats()
+
+        for t in self.transformations:
+            t.disable_stats()
+
+        return self
+
+    def stats(self, indent=Transformation.REPR_INDENT_STEP):
+        args = self.get_base_init_args()
+
+        stats_string = self.get_class_name() + '([' + format_statistics(self)
+
+        for t in self.transformations:
+            stats_string += '\n' + ' ' * indent + t.stats(indent + self.REPR_INDENT_STEP)
+
+        stats_string += '\n' + ' ' * (indent - self.REPR_INDENT_STEP) + '], {args})'.format(args=format_args(args))
+
+        return stats_string
+
     def __len__(self):
         return len(self.transformations)
 
@@ -64,8 +127,12 @@ class Composition(Transformation):
 class Sequential(Composition):
     """Compose transforms to apply sequentially.
     """
-    def __init__(self, transforms, always_apply=False, p=1.0):
+    def __init__(self, transforms, always_apply=False, p=1.0, inplace=False):
         """
+            :NOTE:
+                in inplace mode the input is copied once and then transformations overwrite or reuse buffers,
+                batched data is processed as usual
+
             :args:
                 transforms: list of Apply
                     list of operations to apply sequentially
@@ -73,28 +140,347 @@ class Sequential(Composition):
                     the flag of force application
                 p: float
                     the probability of application
+                inplace: bool
+                    if set to True, the input is copied at most once and transformed in place
         """
         super(Sequential, self).__init__(transforms, always_apply, p)
 
-    def __call__(self, *args, force_apply=False, **data):
+        self.inplace = inplace
+
+    def get_base_init_args(self):
+        args = super(Sequential, self).get_base_init_args()
+
+        if self.inplace:
+            args['inplace'] = self.inplace
+
+        return args
+
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
+        if batched:
+            applied = self.whether_apply_batch(force_apply, get_batch_size(data))
+
+            return apply_to_batch_subset(self._apply_to_batch, applied, **data)
+
         if self.whether_apply(force_apply):
+            if self.inplace and not inplace:
+                data = copy_data(data)
+                inplace = True
+
+            lazy = has_lazy_data(data)
+
             for transform in self.transformations:
-                data = transform(**data)
+                if lazy and not transform.supports_lazy_input:
+                    data = load_data(data)
+                    lazy = False
+
+                data = transform(inplace=inplace, **data)
+
+        return data
+
+    def _apply_to_batch(self, **data):
+        lazy = has_lazy_data(data)
+
+        for transform in self.transformations:
+            if lazy and not transform.supports_lazy_input:
+                data = load_data(data)
+                lazy = False
+
+            data = transform(batched=True, **data)
 
         return data
 
+    @property
+    def supports_lazy_input(self):
+        """
+            :NOTE:
+                lazy arrays are read to memory before the first transformation not supporting them,
+                so leading crops read only cropped parts
+        """
+        return True
+
+    def get_crop_margin(self):
+        margins = [t.get_crop_margin() for t in self.transformations]
+
+        if any(margin is None for margin in margins):
+            return None
+
+        return sum(margins)
+
+    def _stream(self, chunks, template, force_apply=False):
+        if self.whether_apply(force_apply):
+            for transform in self.transformations:
+                chunks = transform._stream(chunks, template)
+
+        return chunks
+
+    def compile(self, crop_first=False):
+        """
+            :NOTE:
+                runs of consecutive affine augmentations are replaced by FusedSequential,
+                nested transformations are compiled with the same options
+
+                if crop_first is set, time crops are moved before preceding transformations commuting with them,
+                so cost of these transformations scales with crop length instead of ecg length, see CropFirstSequential
+
+            :args:
+                crop_first: bool
+                    the flag of moving time crops before transformations
+        """
+        transformations = self.move_crops_first(self.transformations) if crop_first else self.transformations
+
+        transforms = []
+        run = []
+
+        for t in transformations + [None]:
+            if t is not None and getattr(t, 'is_affine', False):
+                run.append(t)
+                continue
+
+            if len(run) > 1:
+                transforms.append(FusedSequential(run, always_apply=True))
+            else:
+                transforms.extend(run)
+
+            run = []
+
+            if t is not None:
+                transforms.append(t.compile(crop_first=crop_first))
+
+        compiled = copy.copy(self)
+        compiled.transformations = transforms
+
+        return compiled
+
+    @staticmethod
+    def move_crops_first(transformations):
+        """Group each time crop with preceding transformations commuting with it to CropFirstSequential
+        """
+        transforms = []
+        run = []
+
+        for t in transformations:
+            if getattr(t, 'is_time_crop', False) and run:
+                transforms.append(CropFirstSequential([t] + run, always_apply=True))
+                run = []
+            elif t.get_crop_margin() is not None:
+                run.append(t)
+            else:
+                transforms.extend(run)
+                transforms.append(t)
+                run = []
+
+        return transforms + run
+
+class FusedSequential(Sequential):
+    """Apply affine augmentations sequentially as one fused expression.
+    """
+    def __init__(self, transforms, always_apply=False, p=1.0):
+        """
+            :NOTE:
+                parameters of transformations are sampled in the same order as Sequential does,
+                so the result matches Sequential up to floating point rounding
+
+                batched data is processed as by Sequential without fusion
+
+            :args:
+                transforms: list of Augmentation
+                    list of affine augmentations to apply sequentially
+                always_apply: bool
+                    the flag of force application
+                p: float
+                    the probability of application
+        """
+        super(FusedSequential, self).__init__(transforms, always_apply, p)
+
+        for idx, t in enumerate(self.transformations):
+            if not getattr(t, 'is_affine', False):
+                raise RuntimeError(
+                    'object at {} position is not affine augmentation'.format(idx)
+                )
+
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
+        if batched:
+            return super(FusedSequential, self).__call__(force_apply=force_apply, batched=batched, inplace=inplace, **data)
+
+        if not self.whether_apply(force_apply):
+            return data
+
+        ecg = data['ecg']
+
+        scale = 1.
+        offsets = []
+
+        for transform in self.transformations:
+            if transform.whether_apply(False):
+                params = transform.sample_params(**data)
+                t_scale, t_offset = transform.get_affine_params(ecg, **params)
+
+                scale = scale * t_scale
+                offsets = [(coef * t_scale, offset) for coef, offset in offsets]
+
+                if t_offset is not None:
+                    offsets.append((1., t_offset))
+
+        if scale == 1. and not offsets:
+            return data
+
+        output = np.multiply(ecg, scale, out=ecg if inplace else None, dtype=ecg.dtype)
+
+        for coef, offset in offsets:
+            if offset.ndim < output.ndim:
+                offset = np.expand_dims(offset, axis=-1)
+
+            if coef != 1.:
+                offset = np.multiply(offset, coef)
+
+            np.add(output, offset, out=output)
+
+        return dict(data, ecg=output)
+
+    @property
+    def supports_lazy_input(self):
+        return False
+
+    def compile(self, **kwargs):
+        return self
+
+class CropFirstSequential(Sequential):
+    """Apply time crop and then transformations to the cropped time segment expanded by their crop margin.
+    """
+    def __init__(self, transforms, always_apply=False, p=1.0):
+        """
+            :NOTE:
+                the result is statistically equivalent to application of transformations and then the time crop,
+                deterministic transformations give the same result, random ones are sampled for the segment only
+
+                only targets of the time crop are cropped, other data (for example, labels) is passed as is
+
+                batched data is processed in the original order
+
+            :args:
+                transforms: list of Transformation
+                    time crop followed by transformations to apply to its time segment
+                always_apply: bool
+                    the flag of force application
+                p: float
+                    the probability of application
+        """
+        super(CropFirstSequential, self).__init__(transforms, always_apply, p)
+
+        if not getattr(self.transformations[0], 'is_time_crop', False):
+            raise RuntimeError('object at 0 position is not time crop')
+
+        for idx, t in enumerate(self.transformations[1:], 1):
+            if t.get_crop_margin() is None:
+                raise RuntimeError(
+                    'object at {} position does not commute with time crop'.format(idx)
+                )
+
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
+        if batched:
+            applied = self.whether_apply_batch(force_apply, get_batch_size(data))
+
+            return apply_to_batch_subset(self._apply_to_batch, applied, **data)
+
+        if not self.whether_apply(force_apply):
+            return data
+
+        crop, *transforms = self.transformations
+
+        if not crop.whether_apply(False):
+            data = load_data(data)
+
+            for transform in transforms:
+                data = transform(inplace=inplace, **data)
+
+            return data
+
+        params = crop.sample_params(**data)
+
+        length = data['ecg'].shape[C.SPATIAL_DIM]
+        margin = sum(t.get_crop_margin() for t in transforms)
+
+        start, stop = crop.get_time_bounds(length, **params)
+        window_start, window_stop = max(start - margin, 0), min(stop + margin, length)
+
+        targets = [name for name in crop.targets if data.get(name) is not None]
+
+        data = dict(data, **{name: load_array(data[name][window_start:window_stop]) for name in targets})
+
+        for transform in transforms:
+            data = transform(inplace=inplace, **data)
+
+        start, stop = start - window_start, stop - window_start
+
+        return dict(data, **{name: data[name][start:stop] for name in targets})
+
+    def _apply_to_batch(self, **data):
+        crop, *transforms = self.transformations
+
+        lazy = has_lazy_data(data)
+
+        for transform in transforms + [crop]:
+            if lazy and not transform.supports_lazy_input:
+                data = load_data(data)
+                lazy = False
+
+            data = transform(batched=True, **data)
+
+        return data
+
+    def get_crop_margin(self):
+        return None
+
 class NonSequential(Sequential):
     """Compose transformations to apply sequentially in random order.
     """
-    def __call__(self, *args, force_apply=False, **data):
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
+        """
+            :NOTE:
+                for batched data the order of transformations is shared by all samples of the batch
+        """
+        if batched:
+            applied = self.whether_apply_batch(force_apply, get_batch_size(data))
+
+            if np.any(applied):
+                self.random_state.shuffle(self.transformations)
+
+            return apply_to_batch_subset(self._apply_to_batch, applied, **data)
+
         if self.whether_apply(force_apply):
-            np.random.shuffle(self.transformations)
+            self.random_state.shuffle(self.transformations)
+
+            if self.inplace and not inplace:
+                data = copy_data(data)
+                inplace = True
+
+            lazy = has_lazy_data(data)
 
             for transform in self.transformations:
-                data = transform(**data)
+                if lazy and not transform.supports_lazy_input:
+                    data = load_data(data)
+                    lazy = False
+
+                data = transform(inplace=inplace, **data)
 
         return data
 
+    def compile(self, **kwargs):
+        """
+            :NOTE:
+                order of transformations is random, so they are not fused or reordered
+        """
+        return Composition.compile(self, **kwargs)
+
+    def _stream(self, chunks, template, force_apply=False):
+        if self.whether_apply(force_apply):
+            self.random_state.shuffle(self.transformations)
+
+            for transform in self.transformations:
+                chunks = transform._stream(chunks, template)
+
+        return chunks
+
 class OneOf(Composition):
     """Select one of transforms to apply.
     """
@@ -118,9 +504,29 @@ class OneOf(Composition):
 
         self.transformations_ps = [t / s for t in transforms_ps]
 
-    def __call__(self, *args, force_apply = False, **data):
+    def __call__(self, *args, force_apply = False, batched=False, inplace=False, **data):
+        if batched:
+            if self.transformations_ps:
+                batch_size = get_batch_size(data)
+
+                applied = self.whether_apply_batch(force_apply, batch_size)
+                choices = self.random_state.choice(len(self.transformations), size=batch_size, p=self.transformations_ps)
+
+                for idx, transform in enumerate(self.transformations):
+                    func = partial(transform, force_apply=True, batched=True)
+                    data = apply_to_batch_subset(func, applied & (choices == idx), **data)
+
+            return data
+
         if self.transformations_ps and self.whether_apply(force_apply):
-            transform = np.random.choice(self.transformations, p=self.transformations_ps)
-            data = transform(force_apply=True, **data)
+            idx = self.random_state.choice(len(self.transformations), p=self.transformations_ps)
+            data = self.transformations[idx](force_apply=True, inplace=inplace, **data)
 
         return data
+
+    def _stream(self, chunks, template, force_apply=False):
+        if self.transformations_ps and self.whether_apply(force_apply):
+            idx = self.random_state.choice(len(self.transformations), p=self.transformations_ps)
+            chunks = self.transformations[idx]._stream(chunks, template, force_apply=True)
+
+        return chunks
@@ -3,9 +3,18 @@ import ecgmentations.core.enum as E
 SPATIAL_DIM = 0
 CHANNEL_DIM = 1
 
+BATCH_DIM = 0
+BATCH_SPATIAL_DIM = 1
+BATCH_CHANNEL_DIM = 2
+
 NUM_SPATIAL_DIMENSIONS = 1
 NUM_MONO_CHANNEL_DIMENSIONS = 1
 NUM_MULTI_CHANNEL_DIMENSIONS = 2
+NUM_BATCH_DIMENSIONS = 3
+
+MIN_FFT_CONV_KERNEL_SIZE = 64
+MIN_FLOAT32_SOS_POLE_DISTANCE = 2.5e-3
+MAX_CACHED_PULSE_LENGTH = 2**16
 
 MAP_BORDER_TYPE_TO_NUMPY = {
     E.BorderType.CONSTANT: 'constant',
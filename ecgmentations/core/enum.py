@@ -19,3 +19,8 @@ class ReductionType(enum.Enum):
     MEAN = 'mean'
     MAX = 'max'
     MEDIAN  = 'median'
+
+class FilterMode(enum.Enum):
+    CAUSAL = 'causal'
+    STEADY_STATE = 'steady_state'
+    ZERO_PHASE = 'zero_phase'
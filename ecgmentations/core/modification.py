@@ -1,7 +1,15 @@
+import copy
 import numpy as np
 
+from functools import partial
+from collections import deque
+
 from ecgmentations.core.transformation import Transformation
-from ecgmentations.core.utils import format_args
+from ecgmentations.core.profiling import format_statistics
+import ecgmentations.core.constants as C
+
+from ecgmentations.core.utils import format_args, get_batch_size, apply_to_batch_subset, spawn_random_states, \
+    get_channel_index, get_stream_template, is_batch_array
 
 class Modification(Transformation):
     def __init__(self, transform, always_apply, p):
@@ -23,6 +31,49 @@ class Modification(Transformation):
 
         self.transform = transform
 
+    def set_random_state(self, random_state):
+        """
+            :NOTE:
+                generator is shared by the nested transformation, otherwise independent generator is spawned for it
+        """
+        random_state, t_random_state = spawn_random_states(random_state, 2)
+
+        super(Modification, self).set_random_state(random_state)
+        self.transform.set_random_state(t_random_state)
+
+        return self
+
+    def compile(self, **kwargs):
+        """
+            :NOTE:
+                the nested transformation is compiled with the same options
+        """
+        compiled = copy.copy(self)
+        compiled.transform = self.transform.compile(**kwargs)
+
+        return compiled
+
+    def enable_stats(self, window=10000):
+        super(Modification, self).enable_stats(window)
+        self.transform.enable_stats(window)
+
+        return self
+
+    def disable_stats(self):
+        super(Modification, self).disable_stats()
+        self.transform.disable_stats()
+
+        return self
+
+    def stats(self, indent=Transformation.REPR_INDENT_STEP):
+        args = self.get_base_init_args()
+
+        stats_string = self.get_class_name() + '(' + format_statistics(self)
+        stats_string += '\n' + ' ' * indent + self.transform.stats(indent + self.REPR_INDENT_STEP)
+        stats_string += '\n' + ' ' * (indent - self.REPR_INDENT_STEP) + ', {args})'.format(args=format_args(args))
+
+        return stats_string
+
     def __repr__(self):
         return self.repr()
 
@@ -73,17 +124,151 @@ class ToChannels(Modification):
                     )
 
         self.channels = channels
+        self.channel_index = get_channel_index(channels) if channels else channels
 
-    def __call__(self, *args, force_apply=False, **data):
-        if self.whether_apply(force_apply):
-            ecg = np.copy(data['ecg'])
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
+        if batched:
+            applied = self.whether_apply_batch(force_apply, get_batch_size(data))
 
-            data['ecg'] = data['ecg'][:, self.channels]
-            data = self.transform(**data)
+            transform = partial(self.transform, batched=True)
 
-            ecg[:, self.channels] = data['ecg']
-            data['ecg'] = ecg
+            data = self._apply_to_batch_channels(transform, applied, **data)
+            data = apply_to_batch_subset(transform, ~applied, **data)
+        elif self.whether_apply(force_apply):
+            data = self._apply_to_channels(partial(self.transform, inplace=inplace), inplace=inplace, **data)
         else:
-            data = self.transform(**data)
+            data = self.transform(inplace=inplace, **data)
 
         return data
+
+    def _apply_to_channels(self, transform, inplace=False, **data):
+        """
+            :NOTE:
+                evenly spaced channels are selected as view, so in inplace mode the transform overwrites the ecg directly
+                and the ecg is not copied if the transform is not applied
+
+                other channels are selected as copy that can be changed in inplace mode, so it is put back in inplace mode,
+                while otherwise the same copy means that the transform is not applied
+        """
+        ecg = data['ecg']
+        selected = ecg[..., self.channel_index]
+
+        data['ecg'] = selected
+        data = transform(**data)
+
+        if data['ecg'] is selected and (not inplace or isinstance(self.channel_index, slice)):
+            data['ecg'] = ecg
+
+            return data
+
+        output = ecg if inplace else np.copy(ecg)
+        output[..., self.channel_index] = data['ecg']
+
+        data['ecg'] = output
+
+        return data
+
+    def _apply_to_batch_channels(self, transform, applied, **data):
+        """Apply the transform to selected channels of samples of the batch selected by boolean mask
+
+            :NOTE:
+                samples and channels are gathered at once and results are scattered to one copy of the batch
+        """
+        if not np.any(applied):
+            return data
+
+        ecg = data['ecg']
+
+        if np.all(applied):
+            indices = slice(None)
+            index = (Ellipsis, self.channel_index)
+        else:
+            indices = np.flatnonzero(applied)
+
+            if isinstance(self.channel_index, slice):
+                index = (indices, slice(None), self.channel_index)
+            else:
+                index = np.ix_(indices, np.arange(ecg.shape[C.BATCH_SPATIAL_DIM]), self.channel_index)
+
+        selected = ecg[index]
+
+        names = [
+            name for name, datum in data.items() if name != 'ecg' and is_batch_array(datum, ecg.shape[C.BATCH_DIM])
+        ]
+
+        pdata = transform(**dict(data, ecg=selected, **{name: data[name][indices] for name in names}))
+
+        if pdata['ecg'] is selected and isinstance(indices, slice) and isinstance(self.channel_index, slice):
+            pdata['ecg'] = ecg
+        else:
+            output = np.copy(ecg)
+            output[index] = pdata['ecg']
+
+            pdata['ecg'] = output
+
+        if isinstance(indices, slice):
+            return pdata
+
+        for name in names:
+            datum = data[name]
+
+            if pdata[name].shape[C.BATCH_DIM + 1:] != datum.shape[C.BATCH_DIM + 1:]:
+                raise RuntimeError(
+                    'Transformation changes the shape of {} and can not be applied to a part of the batch'.format(name)
+                )
+
+            output = np.copy(datum)
+            output[indices] = pdata[name]
+
+            pdata[name] = output
+
+        return pdata
+
+    def get_crop_margin(self):
+        return self.transform.get_crop_margin()
+
+    def check_streaming(self):
+        self.transform.check_streaming()
+
+    def _stream(self, chunks, template, force_apply=False):
+        if not self.whether_apply(force_apply):
+            return self.transform._stream(chunks, template)
+
+        pending = deque()
+
+        def select_channels(chunks):
+            for chunk in chunks:
+                pending.append(chunk)
+                yield chunk[..., self.channel_index]
+
+        shape = (len(template), ) + template[:0][..., self.channel_index].shape[1:]
+        channels_template = get_stream_template(shape, template.dtype)
+
+        return self._merge_stream_channels(
+            self.transform._stream(select_channels(chunks), channels_template), pending
+        )
+
+    def _merge_stream_channels(self, selected_chunks, pending):
+        """Put transformed selected channels to pending chunks of the ecg
+
+            :NOTE:
+                transformed chunks can be delayed, so pending chunks are split to match them
+        """
+        for selected_chunk in selected_chunks:
+            length = len(selected_chunk)
+            parts = []
+
+            while length > 0:
+                chunk = pending.popleft()
+
+                if len(chunk) > length:
+                    pending.appendleft(chunk[length:])
+                    chunk = chunk[:length]
+
+                parts.append(chunk)
+                length -= len(chunk)
+
+            chunk = np.concatenate(parts)
+            chunk[..., self.channel_index] = selected_chunk
+
+            yield chunk
@@ -0,0 +1,164 @@
+import time
+import threading
+import tracemalloc
+import numpy as np
+
+from collections import deque
+from functools import lru_cache
+
+MEMORY_FRAMES = threading.local()
+
+class TransformationStatistics(object):
+    """Statistics of calls of transformation
+    """
+    def __init__(self, window=10000):
+        """
+            :args:
+                window: int
+                    number of last calls to estimate percentiles of call time
+        """
+        self.calls = 0
+        self.samples = 0
+        self.applied = 0
+        self.total_time = 0.
+        self.times = deque(maxlen=window)
+        self.total_allocated = 0
+        self.max_allocated = 0
+
+    def record_application(self, samples, applied):
+        self.samples += samples
+        self.applied += applied
+
+    def record_call(self, elapsed, allocated):
+        self.calls += 1
+        self.total_time += elapsed
+        self.times.append(elapsed)
+
+        if allocated is not None:
+            self.total_allocated += allocated
+            self.max_allocated = max(self.max_allocated, allocated)
+
+    @property
+    def apply_ratio(self):
+        return self.applied / self.samples if self.samples else 0.
+
+    def get_time_percentile(self, q):
+        """
+            :return:
+                output: float
+                    percentile of call time over last calls in seconds
+        """
+        return float(np.percentile(self.times, q)) if self.times else 0.
+
+    def summary(self):
+        """
+            :return:
+                output: str
+                    the short report of statistics
+        """
+        summary = 'calls: {}, applied: {}/{} ({:.1%}), total: {:.3f} ms, p99: {:.3f} ms'.format(
+            self.calls, self.applied, self.samples, self.apply_ratio,
+            1e3 * self.total_time, 1e3 * self.get_time_percentile(99),
+        )
+
+        if self.total_allocated:
+            summary += ', allocated: {:.3f} MB per call, {:.3f} MB max'.format(
+                self.total_allocated / self.calls / 2**20, self.max_allocated / 2**20
+            )
+
+        return summary
+
+def format_statistics(transform):
+    statistics = getattr(transform, 'statistics', None)
+
+    if statistics is None:
+        return ''
+
+    return '  # ' + statistics.summary()
+
+def start_memory_frame():
+    """Start tracking of allocations of the call keeping peaks of outer calls
+    """
+    if not tracemalloc.is_tracing():
+        return
+
+    frames = MEMORY_FRAMES.__dict__.setdefault('frames', [])
+    current, peak = tracemalloc.get_traced_memory()
+
+    if frames:
+        frames[-1][1] = max(frames[-1][1], peak)
+
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+    frames.append([current, current])
+
+def stop_memory_frame():
+    """
+        :return:
+            output: int or None
+                peak size of memory allocated during the call in bytes
+    """
+    frames = getattr(MEMORY_FRAMES, 'frames', None)
+
+    if not frames or not tracemalloc.is_tracing():
+        return None
+
+    start, peak = frames.pop()
+    peak = max(peak, tracemalloc.get_traced_memory()[1])
+
+    if frames:
+        frames[-1][1] = max(frames[-1][1], peak)
+
+    return peak - start
+
+def restore_profiled(cls, state):
+    """Restore pickled transformation with enabled statistics
+    """
+    transform = cls.__new__(cls)
+    transform.__setstate__(state)
+    transform.__class__ = get_profiled_class(cls)
+
+    return transform
+
+@lru_cache(maxsize=None)
+def get_profiled_class(cls):
+    """Create subclass of the transformation class recording statistics of calls
+
+        :NOTE:
+            original class is not changed, so transformations without enabled statistics have no overhead
+    """
+    def __call__(self, *args, **kwargs):
+        start_memory_frame()
+        start = time.perf_counter()
+
+        try:
+            return cls.__call__(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.statistics.record_call(elapsed, stop_memory_frame())
+
+    def whether_apply(self, force_apply):
+        applied = cls.whether_apply(self, force_apply)
+        self.statistics.record_application(1, int(applied))
+
+        return applied
+
+    def whether_apply_batch(self, force_apply, batch_size):
+        applied = cls.whether_apply_batch(self, force_apply, batch_size)
+        self.statistics.record_application(batch_size, int(np.count_nonzero(applied)))
+
+        return applied
+
+    def __reduce__(self):
+        return restore_profiled, (cls, self.__dict__)
+
+    return type(cls.__name__, (cls, ), {
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__call__': __call__,
+        '__reduce__': __reduce__,
+        'whether_apply': whether_apply,
+        'whether_apply_batch': whether_apply_batch,
+        'original_class': cls,
+    })
@@ -1,6 +1,32 @@
+import os
+import weakref
 import numpy as np
 
-from ecgmentations.core.utils import get_shortest_class_fullname
+from itertools import chain, count
+
+from ecgmentations.core.utils import get_shortest_class_fullname, get_stream_template, InheritedRandomState
+from ecgmentations.core.profiling import TransformationStatistics, get_profiled_class, format_statistics
+
+TRANSFORMATIONS = weakref.WeakValueDictionary()
+TRANSFORMATION_IDS = count()
+
+def register_transformation(transform):
+    """Register the transformation to replace its generator in forked processes
+    """
+    TRANSFORMATIONS[next(TRANSFORMATION_IDS)] = transform
+
+def replace_inherited_random_states():
+    """Replace generators of all transformations inherited by the forked process
+
+        :NOTE:
+            generators are replaced lazily on first use, so workers of torch DataLoader derive them from the worker seed
+    """
+    for transform in list(TRANSFORMATIONS.values()):
+        transform.random_state = InheritedRandomState(transform)
+        transform.random_state_pid = os.getpid()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=replace_inherited_random_states)
 
 class Transformation(object):
     """Root class for single and compound augmentations
@@ -19,6 +45,77 @@ class Transformation(object):
         self.always_apply = always_apply
         self.p = p
 
+        self.random_state = np.random.default_rng()
+        self.random_state_pid = os.getpid()
+        self.statistics = None
+
+        register_transformation(self)
+
+    def __setstate__(self, state):
+        """
+            :NOTE:
+                generator inherited by another process (for example, forked or spawned torch DataLoader worker)
+                is replaced by a new one on first use in it, so workers draw different random numbers,
+                call set_random_state in the worker to seed it explicitly
+        """
+        self.__dict__.update(state)
+
+        if self.random_state_pid != os.getpid():
+            self.random_state = InheritedRandomState(self)
+
+        register_transformation(self)
+
+    def set_random_state(self, random_state):
+        """
+            :args:
+                random_state: None or int or np.random.SeedSequence or np.random.Generator
+                    seed to create generator of the transformation or generator itself
+        """
+        if isinstance(random_state, np.random.Generator):
+            self.random_state = random_state
+        else:
+            self.random_state = np.random.default_rng(random_state)
+
+        self.random_state_pid = os.getpid()
+
+        return self
+
+    def enable_stats(self, window=10000):
+        """Enable recording of statistics of calls
+
+            :NOTE:
+                memory allocated by calls is recorded only if tracemalloc is tracing
+
+            :args:
+                window: int
+                    number of last calls to estimate percentiles of call time
+        """
+        self.statistics = TransformationStatistics(window)
+
+        if not self.is_stats_enabled():
+            self.__class__ = get_profiled_class(self.__class__)
+
+        return self
+
+    def disable_stats(self):
+        """Disable recording of statistics of calls, recorded statistics are kept
+        """
+        if self.is_stats_enabled():
+            self.__class__ = self.__class__.original_class
+
+        return self
+
+    def is_stats_enabled(self):
+        return 'original_class' in type(self).__dict__
+
+    def stats(self, indent=REPR_INDENT_STEP):
+        """
+            :return:
+                output: str
+                    the report of statistics of calls in layout of repr
+        """
+        return repr(self) + format_statistics(self)
+
     def get_base_init_args(self):
         """
             :return:
@@ -28,11 +125,118 @@ class Transformation(object):
         return {'always_apply': self.always_apply, 'p': self.p}
 
     def whether_apply(self, force_apply):
-        return force_apply or self.always_apply or (np.random.random() < self.p)
+        return force_apply or self.always_apply or (self.random_state.random() < self.p)
 
-    def __call__(self, *args, force_apply=False, **data):
+    def whether_apply_batch(self, force_apply, batch_size):
+        """
+            :return:
+                output: np.array of bool
+                    the flags of application for each sample of the batch
+        """
+        if force_apply or self.always_apply:
+            return np.ones(batch_size, dtype=bool)
+
+        return self.random_state.random(batch_size) < self.p
+
+    def __call__(self, *args, force_apply=False, batched=False, inplace=False, **data):
         raise NotImplementedError
 
+    @property
+    def supports_lazy_input(self):
+        """
+            :NOTE:
+                transformations supporting lazy input read only needed parts of memory-mapped arrays,
+                other transformations get inputs read to memory by Sequential
+
+            :return:
+                output: bool
+                    the flag that data can contain lazy arrays (for example, np.memmap)
+        """
+        return False
+
+    def get_crop_margin(self):
+        """
+            :NOTE:
+                transformations with crop margin can be applied to the time segment expanded by the margin
+                before crop with statistically equivalent result, see Sequential.compile
+
+            :return:
+                output: int or None
+                    maximal number of samples on each side that output sample depends on,
+                    None if the transformation does not commute with time crops
+        """
+        return None
+
+    def stream(self, chunks, length, force_apply=False):
+        """Apply the transformation to long ecg given by consecutive chunks along time axis
+
+            :NOTE:
+                parameters are sampled once for the whole ecg, so concatenation of output chunks equals to
+                application to the whole ecg if transformations have own random states
+
+                output chunks can differ in length from input ones, only ecg is transformed
+
+                support of streaming is checked for all nested transformations before sampling of parameters,
+                so the result of the check does not depend on random state
+
+            :args:
+                chunks: iterable of np.array
+                    consecutive parts of the ecg of shape (chunk_length, ) or (chunk_length, channels)
+                length: int
+                    length of the whole ecg
+                force_apply: bool
+                    the flag of force application
+
+            :return:
+                output: generator
+                    transformed chunks of the ecg
+        """
+        self.check_streaming()
+
+        chunks = iter(chunks)
+        first = next(chunks, None)
+
+        if first is None:
+            return iter(())
+
+        template = get_stream_template((length, ) + first.shape[1:], first.dtype)
+
+        return iter(self._stream(chain([first], chunks), template, force_apply))
+
+    def check_streaming(self):
+        """Check that the transformation and all nested transformations support streaming
+
+            :NOTE:
+                raises NotImplementedError for the first transformation not supporting streaming
+        """
+        raise NotImplementedError(
+            'Class {} does not support streaming'.format(self.get_class_name())
+        )
+
+    def _stream(self, chunks, template, force_apply=False):
+        """
+            :NOTE:
+                parameters must be sampled eagerly in the order of application to the whole ecg
+
+            :args:
+                template: np.array
+                    zero array of the shape of the whole ecg to sample parameters
+        """
+        raise NotImplementedError(
+            'Class {} does not support streaming'.format(self.get_class_name())
+        )
+
+    def compile(self, **kwargs):
+        """
+            :NOTE:
+                options of compilation are forwarded to nested transformations, see Sequential.compile
+
+            :return:
+                output: Transformation
+                    the transformation optimized for application, it shares random state with the original one
+        """
+        return self
+
     def get_class_name(self):
         """
             :return:
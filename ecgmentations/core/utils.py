@@ -1,3 +1,11 @@
+import os
+import sys
+import numpy as np
+
+import ecgmentations.core.constants as C
+
+PROCESS_SEED_SEQUENCES = {}
+
 def format_args(args_dict):
     formatted_args = []
 
@@ -24,3 +32,222 @@ def shorten_class_name(class_fullname):
 def get_shortest_class_fullname(cls):
     class_fullname = '{cls.__module__}.{cls.__name__}'.format(cls=cls)
     return shorten_class_name(class_fullname)
+
+def get_batch_size(data):
+    ecg = data['ecg']
+
+    if len(ecg.shape) != C.NUM_BATCH_DIMENSIONS:
+        raise ValueError(
+            'Batched ecg must have shape (batch, length, channels), but got: {}.'.format(ecg.shape)
+        )
+
+    return ecg.shape[C.BATCH_DIM]
+
+def collate_params(params_list):
+    """Gather per-sample parameter dicts to dict of per-sample sequences
+    """
+    if not params_list:
+        return {}
+
+    return {k: [params[k] for params in params_list] for k in params_list[0]}
+
+def get_channel_index(channels):
+    """Convert list of channels to slice if channels are evenly spaced in ascending order to select them as view
+
+        :return:
+            output: slice or list of int
+                index of channels
+    """
+    if len(channels) == 1:
+        return slice(channels[0], channels[0] + 1) if channels[0] >= 0 else channels
+
+    step = channels[1] - channels[0]
+
+    if step > 0 and channels[0] >= 0 and all(b - a == step for a, b in zip(channels, channels[1:])):
+        return slice(channels[0], channels[-1] + 1, step)
+
+    return channels
+
+def get_stream_template(shape, dtype):
+    """Get read-only zero array of the shape without memory allocation to sample parameters of streamed ecg
+    """
+    return np.broadcast_to(np.zeros((), dtype=dtype), shape)
+
+def apply_to_chunks_with_margin(chunks, margin, func):
+    """Apply function to chunks of the ecg along time axis with overlap
+
+        :NOTE:
+            ecg is padded by zeros on both sides, so func must treat borders as constant zero padding
+
+            output is delayed by margin samples, but concatenation of output chunks equals to result of func for whole ecg
+
+        :args:
+            chunks: iterable of np.array
+                consecutive parts of the ecg along time axis
+            margin: int
+                number of samples on each side that output sample depends on
+            func: callable
+                the function that preserves length of the ecg
+    """
+    tail = None
+
+    for chunk in chunks:
+        if tail is None:
+            tail = np.zeros((margin, ) + chunk.shape[C.SPATIAL_DIM + 1:], dtype=chunk.dtype)
+
+        window = np.concatenate([tail, chunk])
+
+        if len(window) > 2 * margin:
+            yield func(window)[margin:-margin]
+
+        tail = window[-2 * margin:]
+
+    if tail is not None:
+        window = np.concatenate([tail, np.zeros_like(tail[:margin])])
+
+        if len(window) > 2 * margin:
+            yield func(window)[margin:-margin]
+
+def is_lazy_array(datum):
+    """Check that datum is memory-mapped or other array-like which is read on slicing (for example, h5py dataset)
+    """
+    return isinstance(datum, np.memmap) or (
+        not isinstance(datum, np.ndarray) and hasattr(datum, 'shape') and hasattr(datum, '__getitem__')
+    )
+
+def load_array(datum):
+    """Read lazy array to memory, other arrays are returned as is
+    """
+    if isinstance(datum, np.memmap):
+        return np.array(datum)
+
+    return np.asarray(datum)
+
+def has_lazy_data(data):
+    """
+        :NOTE:
+            transformations do not produce lazy arrays, so data without lazy arrays does not need to be checked again
+    """
+    return any(is_lazy_array(datum) for datum in data.values())
+
+def load_data(data):
+    """Read lazy arrays of data to memory
+    """
+    if not has_lazy_data(data):
+        return data
+
+    return {name: load_array(datum) if is_lazy_array(datum) else datum for name, datum in data.items()}
+
+def copy_data(data):
+    """Copy arrays of data to own them
+
+        :NOTE:
+            lazy arrays are not copied, they are read to new arrays by the first transformation,
+            values other than arrays (for example, labels) are passed as is
+    """
+    return {
+        name: np.copy(datum) if isinstance(datum, np.ndarray) and not is_lazy_array(datum) else datum
+        for name, datum in data.items()
+    }
+
+def is_batch_array(datum, batch_size):
+    """Check that datum is array with samples of the batch along the first axis
+    """
+    return (isinstance(datum, np.ndarray) or is_lazy_array(datum)) and len(datum.shape) > 0 and \
+        datum.shape[C.BATCH_DIM] == batch_size
+
+def apply_to_batch_subset(func, applied, **data):
+    """Apply function to the samples of the batch selected by boolean mask
+
+        :NOTE:
+            values other than arrays of the batch (for example, labels of other types or metadata) are passed as is
+    """
+    if np.all(applied):
+        return func(**data)
+
+    if not np.any(applied):
+        return data
+
+    indices = np.flatnonzero(applied)
+    names = [name for name, datum in data.items() if is_batch_array(datum, len(applied))]
+
+    pdata = func(**dict(data, **{name: data[name][indices] for name in names}))
+
+    for name in names:
+        datum = data[name]
+
+        if pdata[name].shape[C.BATCH_DIM + 1:] != datum.shape[C.BATCH_DIM + 1:]:
+            raise RuntimeError(
+                'Transformation changes the shape of {} and can not be applied to a part of the batch'.format(name)
+            )
+
+        datum = np.copy(datum)
+        datum[indices] = pdata[name]
+
+        pdata[name] = datum
+
+    return pdata
+
+def spawn_random_states(random_state, n):
+    """Derive random states for n transformations
+
+        :NOTE:
+            generator is shared, while seeds are spawned to independent seed sequences
+    """
+    if isinstance(random_state, np.random.Generator):
+        return [random_state] * n
+
+    if not isinstance(random_state, np.random.SeedSequence):
+        random_state = np.random.SeedSequence(random_state)
+
+    return random_state.spawn(n)
+
+def get_worker_seed():
+    """
+        :return:
+            output: int or None
+                seed of the current torch DataLoader worker, None outside of workers
+    """
+    data = sys.modules.get('torch.utils.data')
+
+    if data is None:
+        return None
+
+    info = data.get_worker_info()
+
+    return None if info is None else info.seed
+
+def spawn_process_random_state():
+    """Create generator of a transformation inherited from another process
+
+        :NOTE:
+            generators of the process are spawned in order of requests from one seed sequence,
+            seeded by the worker seed in torch DataLoader workers and by fresh entropy otherwise
+    """
+    pid = os.getpid()
+
+    if pid not in PROCESS_SEED_SEQUENCES:
+        PROCESS_SEED_SEQUENCES[pid] = np.random.SeedSequence(get_worker_seed())
+
+    return np.random.default_rng(PROCESS_SEED_SEQUENCES[pid].spawn(1)[0])
+
+class InheritedRandomState(object):
+    """Placeholder of generator of a transformation inherited from another process
+
+        :NOTE:
+            on first use the placeholder is replaced in the transformation by a generator of the process,
+            so there is no overhead of checks of the process on each draw
+    """
+    def __init__(self, transform):
+        self.transform = transform
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        random_state = spawn_process_random_state()
+
+        self.transform.random_state = random_state
+        self.transform.random_state_pid = os.getpid()
+
+        return getattr(random_state, name)
@@ -0,0 +1,98 @@
+import os
+import copy
+import numpy as np
+
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+BACKENDS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+def apply_to_chunk(transform, random_state, chunk):
+    """Apply own copy of the transformation with own random state to each record of the chunk
+    """
+    transform = copy.deepcopy(transform)
+    transform.set_random_state(random_state)
+
+    return [
+        transform(**record) if isinstance(record, dict) else transform(ecg=record)['ecg'] for record in chunk
+    ]
+
+def map(transform, records, workers=None, backend='thread', chunksize=16, ordered=True, random_state=None):
+    """Apply the transformation to each record in parallel workers
+
+        :NOTE:
+            records are split to chunks, each chunk gets independent random state spawned from random_state,
+            so results are reproducible for the same random_state and chunksize regardless of workers
+
+            most of heavy functional operations release GIL, so thread backend is usually enough
+
+        :args:
+            transform: Transformation
+                the transformation to apply
+            records: iterable of np.array or dict
+                ecgs or dicts of named data (for example: {'ecg': ecg, 'mask': mask}) to transform
+            workers: int or None
+                number of workers, if None the number of processors is used
+            backend: str
+                'thread' or 'process'
+            chunksize: int
+                number of records in one task of worker
+            ordered: bool
+                if set to True, results are yielded in order of records, otherwise in order of completion
+            random_state: None or int or np.random.SeedSequence
+                seed to spawn random states of chunks
+
+        :return:
+            output: generator
+                transformed ecgs or dicts of transformed data
+    """
+    if backend not in BACKENDS:
+        raise ValueError('Get invalid backend: {}. Must be one of {}.'.format(backend, tuple(BACKENDS)))
+
+    if not isinstance(random_state, np.random.SeedSequence):
+        random_state = np.random.SeedSequence(random_state)
+
+    workers = workers or os.cpu_count() or 1
+
+    return iterate_results(transform, iter(records), BACKENDS[backend], workers, chunksize, ordered, random_state)
+
+def iterate_results(transform, records, executor_class, workers, chunksize, ordered, random_state):
+    """Submit chunks of records to workers keeping bounded number of pending chunks and yield results
+    """
+    executor = executor_class(max_workers=workers)
+    max_pending = 2 * workers
+
+    pending = deque()
+
+    def submit():
+        chunk = list(islice(records, chunksize))
+
+        if chunk:
+            pending.append(executor.submit(apply_to_chunk, transform, random_state.spawn(1)[0], chunk))
+
+        return bool(chunk)
+
+    try:
+        while len(pending) < max_pending and submit():
+            pass
+
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+
+            yield from future.result()
+
+            submit()
+    finally:
+        for future in pending:
+            future.cancel()
+
+        executor.shutdown(wait=True)
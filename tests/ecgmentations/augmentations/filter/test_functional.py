@@ -0,0 +1,105 @@
+import pytest
+
+import numpy as np
+import ecgmentations.augmentations.filter.functional as F
+
+@pytest.mark.parametrize('filter, cutoff', [
+    (F.lowpass_filter, 47.),
+    (F.highpass_filter, 0.5),
+    (F.bandpass_filter, (0.5, 47.)),
+])
+def test_filter_CASE_multi_channel(filter, cutoff):
+    input = np.random.randn(5000, 12)
+
+    output = filter(input, 500., cutoff)
+    expected = np.stack([filter(channel, 500., cutoff) for channel in input.T], axis=1)
+
+    assert output.flags['C_CONTIGUOUS'] == True
+    assert np.allclose(output, expected)
+
+def test_butterworth_sos_CASE_cache():
+    sos = F.butterworth_sos(3, 47., 'low', 500.)
+
+    assert sos is F.butterworth_sos(3, 47., 'low', 500.)
+    assert sos.shape == (2, 6)
+
+@pytest.mark.parametrize('filter, cutoff', [
+    (F.lowpass_filter, 47.),
+    (F.highpass_filter, 0.5),
+    (F.highpass_filter, 0.05),
+])
+def test_filter_CASE_float32(filter, cutoff):
+    input = np.cumsum(np.random.randn(20000, 12), axis=0)
+
+    output = filter(input.astype(np.float32), 500., cutoff)
+    expected = filter(input, 500., cutoff)
+
+    assert output.dtype == np.float32
+    assert np.max(np.abs(output - expected)) < 1e-3 * np.max(np.abs(expected))
+
+@pytest.mark.parametrize('cutoff, dtype', [
+    (47., np.float32),
+    (0.5, np.float32),
+    (0.05, np.float64),
+])
+def test_get_sos_compute_dtype_CASE_float32(cutoff, dtype):
+    sos = F.butterworth_sos(3, cutoff, 'high', 500.)
+
+    assert F.get_sos_compute_dtype(sos, np.float32) == dtype
+    assert F.get_sos_compute_dtype(sos, np.float64) == np.float64
+
+@pytest.mark.parametrize('filter, cutoff', [
+    (F.lowpass_filter, 47.),
+    (F.highpass_filter, 0.5),
+    (F.bandpass_filter, (0.5, 47.)),
+])
+@pytest.mark.parametrize('layout', ['batch', 'transposed', 'float16'])
+def test_filter_CASE_along_time(filter, cutoff, layout):
+    input = np.random.randn(4, 5000, 12)
+
+    if layout == 'batch':
+        expected = np.stack([filter(ecg, 500., cutoff) for ecg in input])
+    elif layout == 'transposed':
+        input = np.ascontiguousarray(input[0].T).T
+        expected = filter(np.ascontiguousarray(input), 500., cutoff)
+    else:
+        input = input[0].astype(np.float16)
+        expected = filter(input.astype(np.float32), 500., cutoff).astype(np.float16)
+
+    output = filter(input, 500., cutoff)
+
+    assert output.dtype == input.dtype
+    assert output.flags['C_CONTIGUOUS'] == True
+    assert np.allclose(output, expected, atol=1e-3)
+
+@pytest.mark.parametrize('filter, cutoff', [
+    (F.lowpass_filter, 47.),
+    (F.highpass_filter, 0.5),
+    (F.bandpass_filter, (0.5, 47.)),
+])
+@pytest.mark.parametrize('mode', ['steady_state', 'zero_phase'])
+def test_filter_CASE_mode(filter, cutoff, mode):
+    input = np.random.randn(4, 5000, 12)
+
+    output = filter(input, 500., cutoff, mode)
+    expected = np.stack([
+        np.stack([filter(channel, 500., cutoff, mode) for channel in ecg.T], axis=1) for ecg in input
+    ])
+
+    assert output.flags['C_CONTIGUOUS'] == True
+    assert np.allclose(output, expected)
+
+def test_lowpass_filter_CASE_steady_state_AND_constant():
+    input = np.full((5000, 12), 3.)
+
+    output = F.lowpass_filter(input, 500., 47., 'steady_state')
+
+    assert np.allclose(output, input)
+
+def test_lowpass_filter_CASE_zero_phase_AND_no_lag():
+    time = np.arange(5000) / 500.
+    input = np.sin(2 * np.pi * time)
+
+    output = F.lowpass_filter(input, 500., 10., 'zero_phase')
+
+    assert np.allclose(output[500:-500], input[500:-500], atol=1e-3)
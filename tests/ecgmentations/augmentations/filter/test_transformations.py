@@ -0,0 +1,122 @@
+import pytest
+
+import numpy as np
+import ecgmentations as E
+import ecgmentations.augmentations.filter.functional as F
+
+def test_LowPassFilter_CASE_fixed_cutoff():
+    input = np.random.randn(5000, 12)
+
+    instance = E.LowPassFilter(cutoff_frequency=40., always_apply=True)
+
+    output = instance(ecg=input)['ecg']
+    expected = F.lowpass_filter(input, 500., 40.)
+
+    assert len(instance.bank) == 1
+    assert np.allclose(output, expected)
+
+def test_HighPassFilter_CASE_cutoff_range():
+    instance = E.HighPassFilter(cutoff_frequency=(0.5, 2.), bank_size=4, always_apply=True)
+
+    expected = np.stack([F.butterworth_sos(3, c, 'high', 500.) for c in (0.5, 1., 1.5, 2.)])
+
+    assert np.allclose(instance.bank, expected)
+
+def test_BandPassFilter_CASE_cutoff_ranges():
+    instance = E.BandPassFilter(cutoff_frequencies=((0.5, 1.), (40., 47.)), bank_size=10, always_apply=True)
+
+    assert len(instance.bank) == 9
+
+@pytest.mark.parametrize('cutoff', [((0.5, 40.), (30., 47.)), ((0.5, 30.), (30., 47.)), (30., 30.)])
+def test_BandPassFilter_CASE_overlapping_cutoff_ranges(cutoff):
+    with pytest.raises(ValueError, match=r'low cutoff frequencies not less than high ones'):
+        E.BandPassFilter(cutoff_frequencies=cutoff)
+
+@pytest.mark.parametrize('transform, cutoff', [
+    (E.LowPassFilter, 40.),
+    (E.BandPassFilter, (0.5, 47.)),
+])
+def test_Filter_CASE_fixed_cutoff_AND_random_state(transform, cutoff):
+    generator = np.random.default_rng(0)
+    expected = np.random.default_rng(0).random()
+
+    instance = transform(500., cutoff, always_apply=True).set_random_state(generator)
+
+    assert instance.get_params() == {'filter_index': 0}
+    assert np.all(instance.get_batch_params(4)['filter_index'] == 0)
+    assert generator.random() == expected
+
+def test_BandPassFilter_CASE_one_cutoff_range():
+    instance = E.BandPassFilter(cutoff_frequencies=((0.3, 1.), (40., 40.)), bank_size=32, always_apply=True)
+
+    assert len(instance.bank) == 32
+
+def test_BandPassFilter_CASE_bank_memory_limit():
+    instance = E.BandPassFilter(cutoff_frequencies=((0.5, 1.), (40., 47.)), bank_memory_limit=1024, always_apply=True)
+
+    assert instance.bank.nbytes <= 1024
+
+@pytest.mark.parametrize('transform, cutoff', [
+    (E.LowPassFilter, (30., 47.)),
+    (E.HighPassFilter, (0.5, 2.)),
+    (E.BandPassFilter, ((0.5, 1.), (40., 47.))),
+])
+def test_Filter_CASE_call_AND_batch(transform, cutoff):
+    input = np.random.randn(8, 5000, 12)
+
+    instance = transform(500., cutoff, always_apply=True)
+
+    params = instance.get_batch_params(len(input))
+    output = instance.apply_batch(input, **params)
+
+    expected = np.stack([instance.apply(ecg, index) for ecg, index in zip(input, params['filter_index'])])
+
+    assert output.flags['C_CONTIGUOUS'] == True
+    assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('mode', [E.FilterMode.STEADY_STATE, E.FilterMode.ZERO_PHASE])
+def test_Filter_CASE_mode(mode):
+    input = np.random.randn(8, 5000, 12)
+
+    instance = E.BandPassFilter(500., ((0.5, 1.), (40., 47.)), mode=mode, always_apply=True)
+
+    params = instance.get_batch_params(len(input))
+    output = instance.apply_batch(input, **params)
+
+    expected = np.stack([
+        F.sos_filter(ecg, instance.bank[index], mode) for ecg, index in zip(input, params['filter_index'])
+    ])
+
+    assert np.allclose(output, expected)
+
+def test_Filter_CASE_steady_state_AND_stream():
+    input = np.random.randn(5000, 12) + 10.
+
+    instance = E.HighPassFilter(mode='steady_state', always_apply=True)
+
+    expected = instance(ecg=input)['ecg']
+    chunks = list(instance.stream(np.array_split(input, 7), len(input)))
+
+    assert len(instance.bank_steady_states) == len(instance.bank)
+    assert np.allclose(np.concatenate(chunks), expected)
+    assert np.abs(expected[:100]).max() < np.abs(F.highpass_filter(input, 500., 0.5)[:100]).max()
+
+def test_Filter_CASE_zero_phase_AND_stream():
+    input = np.random.randn(5000, 12)
+
+    for seed in range(8):
+        instance = E.LowPassFilter(mode='zero_phase', p=0.5).set_random_state(seed)
+
+        with pytest.raises(NotImplementedError, match=r'does not support streaming'):
+            instance.stream(np.array_split(input, 7), len(input))
+
+@pytest.mark.parametrize('length', [0, 1, 5, 21, 22])
+def test_Filter_CASE_zero_phase_AND_short(length):
+    input = np.random.randn(length, 12)
+
+    instance = E.BandPassFilter(mode=E.FilterMode.ZERO_PHASE, always_apply=True)
+
+    output = instance(ecg=input)['ecg']
+
+    assert output.shape == input.shape
+    assert np.all(np.isfinite(output))
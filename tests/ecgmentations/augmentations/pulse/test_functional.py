@@ -0,0 +1,41 @@
+import pytest
+
+import numpy as np
+import ecgmentations.augmentations.pulse.functional as F
+
+def test_get_time_grid_CASE_cache():
+    t = F.get_time_grid(5000, 500.)
+
+    assert t is F.get_time_grid(5000, 500.)
+    assert not t.flags['WRITEABLE']
+    assert np.allclose(t, np.linspace(0, 10., 5000))
+
+def test_get_time_grid_CASE_long_AND_not_cached():
+    length = F.C.MAX_CACHED_PULSE_LENGTH + 1
+
+    t = F.get_time_grid(length, 500.)
+    sine, cosine = F.get_sine_waveforms(length, 500., 50.)
+
+    assert t is not F.get_time_grid(length, 500.)
+    assert sine is not F.get_sine_waveforms(length, 500., 50.)[0]
+    assert np.allclose(t, np.linspace(0, length / 500., length))
+    assert np.allclose(sine, np.sin(2 * np.pi * 50. * t))
+
+def test_add_fixed_frequency_sine_pulse_CASE_multi_channel():
+    input = np.random.randn(5000, 12)
+
+    output = F.add_fixed_frequency_sine_pulse(input, 500., 0.3, 50., 1.)
+    expected = F.add_sine_pulse(input, 500., 0.3, 50., 1.)
+
+    assert np.allclose(output, expected)
+
+def test_add_fixed_frequency_sine_pulse_CASE_batch():
+    input = np.random.randn(4, 5000, 12)
+
+    amplitude = np.random.random(4)
+    phase = np.random.random(4) * 2 * np.pi
+
+    output = F.add_fixed_frequency_sine_pulse(input, 500., amplitude, 50., phase)
+    expected = np.stack([F.add_sine_pulse(ecg, 500., a, 50., p) for ecg, a, p in zip(input, amplitude, phase)])
+
+    assert np.allclose(output, expected)
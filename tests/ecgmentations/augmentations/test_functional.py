@@ -1,6 +1,7 @@
 import pytest
 
 import numpy as np
+import ecgmentations as E
 import ecgmentations.augmentations.functional as F
 
 def test_amplitude_invert_CASE_default():
@@ -37,3 +38,49 @@ def test_channel_dropout_CASE_default():
     expected = np.array([[0, 0, 0, 0, 0, 0], [6, 5, 4, 3, 2, 1]]).T
 
     assert np.allclose(output, expected)
+
+def test_channel_dropout_CASE_inplace():
+    input = np.array([[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]]).T
+
+    channels_to_drop = (0, )
+    fill_value = 0
+
+    output = F.channel_dropout(input, channels_to_drop, fill_value, out=input)
+    expected = np.array([[0, 0, 0, 0, 0, 0], [6, 5, 4, 3, 2, 1]]).T
+
+    assert output is input
+    assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('kernel_size', [5, 101])
+def test_conv_CASE_multi_channel(kernel_size):
+    input = np.random.randn(1000, 3)
+    kernel = np.random.rand(kernel_size)
+
+    pad_width = kernel_size // 2
+
+    output = F.conv(input, kernel, E.BorderType.CONSTANT, 0.)
+    expected = np.stack([
+        np.correlate(np.pad(channel, pad_width), kernel, mode='valid') for channel in input.T
+    ], axis=1)
+
+    assert output.shape == input.shape
+    assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('kernel_size', [5, 101])
+def test_conv_CASE_batch(kernel_size):
+    input = np.random.randn(4, 1000, 3)
+    kernel = np.random.rand(kernel_size)
+
+    output = F.conv(input, kernel, E.BorderType.REPLICATE, None)
+    expected = np.stack([F.conv(ecg, kernel, E.BorderType.REPLICATE, None) for ecg in input])
+
+    assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('dtype, expected', [
+    (np.float16, np.float32),
+    (np.float32, np.float32),
+    (np.float64, np.float64),
+    (np.int16, np.float64),
+])
+def test_get_compute_dtype(dtype, expected):
+    assert F.get_compute_dtype(dtype) == expected
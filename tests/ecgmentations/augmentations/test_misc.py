@@ -81,4 +81,15 @@ def test_prepare_float_asymrange_CASE_tuple_float_AND_low():
 
 def test_prepare_int_asymrange_CASE_tuple_float_AND_long():
     with pytest.raises(ValueError):
-        M.prepare_float_asymrange((0., 1., 2.), '', 0.)
\ No newline at end of file
+        M.prepare_float_asymrange((0., 1., 2.), '', 0.)
+
+def test_prepare_non_negative_float_or_asymrange_CASE_float():
+    output = M.prepare_non_negative_float_or_asymrange(1., '')
+
+    assert pytest.approx(output) == 1.
+
+def test_prepare_non_negative_float_or_asymrange_CASE_tuple_float():
+    output = M.prepare_non_negative_float_or_asymrange((2., 1.), '')
+    expected = (1., 2.)
+
+    assert pytest.approx(output) == expected
@@ -95,4 +95,113 @@ def test_Transform_CASE_call_AND_multi_channel(transform):
     assert tmask.shape == mask.shape
 
     if isinstance(transform, E.EcgOnlyAugmentation):
-        assert np.all(tmask == mask)
\ No newline at end of file
+        assert np.all(tmask == mask)
+
+@pytest.mark.parametrize('transform', SHAPE_PRESERVED_TRANSFORMS)
+def test_Transform_CASE_call_AND_batch(transform):
+    ecg = np.random.randn(8, 5000, 12).astype(np.float32)
+    mask = np.zeros((8, 5000, 1), dtype=np.uint8)
+
+    tecg = np.copy(ecg)
+    tmask = np.copy(mask)
+
+    instance = transform(always_apply=True)
+    transformed = instance(ecg=tecg, mask=tmask, batched=True)
+
+    tecg, tmask = transformed['ecg'], transformed['mask']
+
+    assert tecg.dtype == ecg.dtype
+    assert tecg.shape == ecg.shape
+    assert not np.allclose(tecg, ecg)
+
+    assert tmask.dtype == mask.dtype
+    assert tmask.shape == mask.shape
+
+    if isinstance(transform, E.EcgOnlyAugmentation):
+        assert np.all(tmask == mask)
+
+@pytest.mark.parametrize('transform', SHAPE_PRESERVED_TRANSFORMS)
+@pytest.mark.parametrize('dtype', [np.float16, np.float32])
+def test_Transform_CASE_call_AND_dtype(transform, dtype):
+    ecg = np.random.randn(5000, 12).astype(dtype)
+
+    instance = transform(always_apply=True)
+
+    tecg = instance(ecg=np.copy(ecg))['ecg']
+    btecg = instance(ecg=np.copy(ecg[None]), batched=True)['ecg']
+
+    assert tecg.dtype == ecg.dtype
+    assert btecg.dtype == ecg.dtype
+
+STREAMED_TRANSFORMS = [
+    E.AmplitudeInvert,
+    E.ChannelShuffle,
+    E.ChannelDropout,
+    E.GaussNoise,
+    E.GaussBlur,
+    E.AmplitudeScale,
+    E.TimeCutout,
+    E.Pooling,
+    E.Blur,
+    E.PowerlineNoise,
+    E.SinePulse,
+    E.SquarePulse,
+    E.RespirationNoise,
+    E.LowPassFilter,
+    E.HighPassFilter,
+    E.BandPassFilter,
+    E.SigmoidCompression,
+]
+
+def split_to_chunks(ecg, seed):
+    bounds = np.sort(np.random.default_rng(seed).integers(0, len(ecg), size=7))
+
+    return np.split(ecg, bounds)
+
+@pytest.mark.parametrize('transform', STREAMED_TRANSFORMS)
+@pytest.mark.parametrize('shape', [(5000, ), (5000, 12)])
+def test_Transform_CASE_stream(transform, shape):
+    if len(shape) == 1 and transform in (E.ChannelShuffle, E.ChannelDropout):
+        return
+
+    ecg = np.random.randn(*shape)
+
+    instance = transform(always_apply=True)
+
+    expected = instance.set_random_state(0)(ecg=ecg)['ecg']
+    chunks = list(instance.set_random_state(0).stream(split_to_chunks(ecg, 0), len(ecg)))
+
+    assert np.allclose(np.concatenate(chunks), expected)
+
+@pytest.mark.parametrize('transform', [E.TimeReverse, E.TimeShift, E.TimeSegmentShuffle, E.RandomTimeWrap])
+def test_Transform_CASE_stream_AND_not_supported(transform):
+    ecg = np.random.randn(5000, 12)
+
+    instance = transform(always_apply=True)
+
+    with pytest.raises(NotImplementedError, match=r'does not support streaming'):
+        list(instance.stream(split_to_chunks(ecg, 0), len(ecg)))
+
+@pytest.mark.parametrize('transform', [E.TimeReverse, E.TimeShift, E.TimeCrop, E.RandomTimeWrap])
+@pytest.mark.parametrize('seed', range(4))
+def test_Transform_CASE_stream_AND_not_supported_AND_random(transform, seed):
+    ecg = np.random.randn(5000, 12)
+
+    instance = transform(p=0.5).set_random_state(seed)
+
+    with pytest.raises(NotImplementedError, match=r'does not support streaming'):
+        instance.stream(split_to_chunks(ecg, 0), len(ecg))
+
+@pytest.mark.parametrize('transform', [E.TimeCrop, E.RandomTimeCrop, E.CenterTimeCrop])
+def test_Transform_CASE_call_AND_memmap(tmp_path, transform):
+    ecg = np.random.randn(20000, 12)
+    path = tmp_path / 'ecg.npy'
+    np.save(path, ecg)
+
+    instance = transform(length=1000, always_apply=True)
+
+    expected = instance.set_random_state(0)(ecg=ecg)['ecg']
+    output = instance.set_random_state(0)(ecg=np.load(path, mmap_mode='r'))['ecg']
+
+    assert not isinstance(output, np.memmap)
+    assert np.array_equal(output, expected)
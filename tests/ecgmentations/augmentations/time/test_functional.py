@@ -36,7 +36,7 @@ def test_time_shift_CASE_negative_shift():
 
     assert np.allclose(output, expected)
 
-def time_segment_swap_CASE_default():
+def test_time_segment_swap_CASE_default():
     input = np.array([[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]]).T
 
     segment_order = [2, 0, 1]
@@ -46,6 +46,26 @@ def time_segment_swap_CASE_default():
 
     assert np.allclose(output, expected)
 
+def test_time_segment_swap_CASE_not_divisible_length():
+    input = np.arange(7)
+
+    segment_order = [2, 0, 1]
+
+    output = F.time_segment_swap(input, segment_order)
+    expected = np.array([5, 6, 0, 1, 2, 3, 4])
+
+    assert np.array_equal(output, expected)
+
+def test_time_segment_swap_CASE_batch():
+    input = np.random.randn(4, 103, 3)
+
+    segment_order = np.array([np.random.permutation(5) for _ in range(len(input))])
+
+    output = F.time_segment_swap(input, segment_order)
+    expected = np.stack([F.time_segment_swap(ecg, order) for ecg, order in zip(input, segment_order)])
+
+    assert np.array_equal(output, expected)
+
 def test_time_cutout_CASE_default():
     input = np.array([[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]]).T
 
@@ -57,6 +77,18 @@ def test_time_cutout_CASE_default():
 
     assert np.allclose(output, expected)
 
+def test_time_cutout_CASE_inplace():
+    input = np.array([[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]]).T
+
+    cutouts = [(0, 2)]
+    fill_value = 0
+
+    output = F.time_cutout(input, cutouts, fill_value, out=input)
+    expected = np.array([[0, 0, 3, 4, 5, 6], [0, 0, 4, 3, 2, 1]]).T
+
+    assert output is input
+    assert np.allclose(output, expected)
+
 def test_time_crop_CASE_default():
     input = np.array([[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]]).T
 
@@ -109,3 +141,144 @@ def test_pad_CASE_border_replicate():
     expected = np.array([[1, 1, 1, 2, 3, 4, 5, 6, 6, 6], [6, 6, 6, 5, 4, 3, 2, 1, 1, 1]]).T
 
     assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('border_mode', [E.BorderType.CONSTANT, E.BorderType.REPLICATE, E.BorderType.REFLECT_101, E.BorderType.WRAP])
+def test_time_shift_CASE_batch(border_mode):
+    input = np.random.randn(4, 6, 2)
+    shifts = np.array([0.167, -0.167, 0.5, -1.5])
+
+    output = F.time_shift(input, shifts, border_mode, 0.)
+    expected = np.stack([F.time_shift(ecg, shift, border_mode, 0.) for ecg, shift in zip(input, shifts)])
+
+    assert np.allclose(output, expected)
+
+def test_time_cutout_CASE_batch():
+    input = np.array([[[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]], [[1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]]]).transpose(0, 2, 1)
+
+    cutouts = np.array([[(0, 2), (5, 0)], [(3, 1), (5, 1)]])
+    fill_value = 0
+
+    output = F.time_cutout(input, cutouts, fill_value)
+    expected = np.array([
+        [[0, 0, 3, 4, 5, 6], [0, 0, 4, 3, 2, 1]],
+        [[1, 2, 3, 0, 5, 0], [6, 5, 4, 0, 2, 0]],
+    ]).transpose(0, 2, 1)
+
+    assert np.allclose(output, expected)
+
+def test_get_cutout_index_CASE_overlapped_ranges():
+    length = 100
+    cutouts = np.random.randint(0, 120, size=(4, 10, 2))
+
+    output = np.zeros(len(cutouts) * length, dtype=bool)
+    output[F.get_cutout_index(length, cutouts)] = True
+
+    expected = np.zeros((len(cutouts), length), dtype=bool)
+
+    for mask, ranges in zip(expected, cutouts):
+        for cutout_start, cutout_length in ranges:
+            mask[cutout_start: cutout_start+cutout_length] = True
+
+    assert np.array_equal(output.reshape(expected.shape), expected)
+    assert np.array_equal(np.unique(F.get_cutout_index(length, cutouts[0])), np.flatnonzero(expected[0]))
+
+@pytest.mark.parametrize('border_mode', [E.BorderType.CONSTANT, E.BorderType.REPLICATE, E.BorderType.REFLECT_101, E.BorderType.WRAP])
+def test_pad_CASE_out(border_mode):
+    input = np.random.randn(6, 2)
+
+    left_pad = 3
+    rigth_pad = 8
+
+    out = np.empty((left_pad + 6 + rigth_pad, 2))
+
+    output = F.pad(input, left_pad, rigth_pad, border_mode, 0., out=out)
+    expected = F.pad(input, left_pad, rigth_pad, border_mode, 0.)
+
+    assert output is out
+    assert np.allclose(output, expected)
+
+def test_pad_CASE_batch():
+    input = np.random.randn(4, 6, 2)
+
+    left_pad = 2
+    rigth_pad = 2
+
+    output = F.pad(input, left_pad, rigth_pad, E.BorderType.REPLICATE, None)
+    expected = np.stack([F.pad(ecg, left_pad, rigth_pad, E.BorderType.REPLICATE, None) for ecg in input])
+
+    assert output.shape == (4, 10, 2)
+    assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('border_mode', [E.BorderType.CONSTANT, E.BorderType.REPLICATE, E.BorderType.REFLECT_101, E.BorderType.WRAP])
+def test_time_shift_CASE_inplace(border_mode):
+    input = np.random.randn(6, 2)
+    expected = F.time_shift(input, 0.5, border_mode, 0.)
+
+    output = F.time_shift(input, 0.5, border_mode, 0., out=input)
+
+    assert output is input
+    assert np.allclose(output, expected)
+
+def test_time_shift_CASE_replicate_border():
+    input = np.array([[1, 2, 3, 4, 5, 6], ]).T
+
+    output = F.time_shift(input, -0.334, E.BorderType.REPLICATE, None)
+    expected = np.array([[3, 4, 5, 6, 6, 6], ]).T
+
+    assert np.allclose(output, expected)
+
+def test_time_wrap_CASE_identity():
+    input = np.random.randn(100, 2)
+
+    cells = np.linspace(0, 1, 6)
+
+    output = F.time_wrap(input, cells, cells)
+
+    assert np.allclose(output, input)
+
+def test_time_wrap_CASE_stretch():
+    input = np.array([[0., 2., 4., 6., 8., 10., 12., 14., 16., 18.], ]).T
+
+    cells = np.array([0., 0.5, 1.])
+    ncells = np.array([0., 0.3, 1.])
+
+    output = F.time_wrap(input, cells, ncells)
+    expected = np.array([[0., 4., 8., 10., 34 / 3, 38 / 3, 14., 46 / 3, 50 / 3, 18.], ]).T
+
+    assert np.allclose(output, expected)
+
+def test_time_wrap_CASE_batch():
+    input = np.random.randn(3, 100, 2)
+
+    cells = np.tile(np.linspace(0, 1, 4), (3, 1))
+    ncells = np.array([[0., 0.3, 0.6, 1.], [0., 0.35, 0.7, 1.], [0., 0.32, 0.64, 1.]])
+
+    output = F.time_wrap(input, cells, ncells)
+    expected = np.stack([F.time_wrap(ecg, cells_, ncells_) for ecg, cells_, ncells_ in zip(input, cells, ncells)])
+
+    assert np.allclose(output, expected)
+
+@pytest.mark.parametrize('reduction', [E.ReductionType.MIN, E.ReductionType.MEAN, E.ReductionType.MAX, E.ReductionType.MEDIAN])
+@pytest.mark.parametrize('border_mode', [E.BorderType.CONSTANT, E.BorderType.REPLICATE, E.BorderType.REFLECT_101, E.BorderType.WRAP])
+@pytest.mark.parametrize('shape', [(500, ), (500, 3), (2, 500, 3)])
+def test_pooling_CASE_along_time(reduction, border_mode, shape):
+    input = np.random.randn(*shape)
+    kernel_size = 101
+
+    reduce = {
+        E.ReductionType.MIN: np.min,
+        E.ReductionType.MEAN: np.mean,
+        E.ReductionType.MAX: np.max,
+        E.ReductionType.MEDIAN: np.median,
+    }[reduction]
+
+    dim = len(shape) - 2 if len(shape) > 1 else 0
+
+    padded = F.pad(input, kernel_size // 2, kernel_size // 2, border_mode, 0.5)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, kernel_size, axis=dim)
+
+    output = F.pooling(input, reduction, kernel_size, border_mode, 0.5)
+    expected = reduce(windows, axis=-1)
+
+    assert output.shape == input.shape
+    assert np.allclose(output, expected)
@@ -1,4 +1,6 @@
+import copy
 import pytest
+import tracemalloc
 
 import numpy as np
 import ecgmentations as E
@@ -80,3 +82,434 @@ def test_OneOf_CASE_call_AND_check_application():
     output = instance(ecg=input)['ecg']
 
     assert np.allclose(output, input)
+
+@pytest.mark.core
+def test_Sequential_CASE_call_AND_batch():
+    input = np.random.randn(16, 5000, 12)
+
+    instance = E.Sequential([
+        E.TimeReverse(always_apply=True),
+        E.TimeReverse(always_apply=True)
+    ], always_apply=True)
+
+    output = instance(ecg=input, batched=True)['ecg']
+
+    assert np.allclose(output, input)
+
+@pytest.mark.core
+def test_Sequential_CASE_call_AND_batch_AND_partial_application():
+    input = np.random.randn(64, 5000, 12)
+
+    instance = E.Sequential([
+        E.TimeReverse(always_apply=True),
+    ], p=0.5)
+
+    output = instance(ecg=input, batched=True)['ecg']
+
+    reversed = np.all(np.isclose(output, input[:, ::-1]), axis=(1, 2))
+    preserved = np.all(np.isclose(output, input), axis=(1, 2))
+
+    assert np.all(reversed | preserved)
+    assert np.any(reversed) and np.any(preserved)
+
+@pytest.mark.core
+def test_Sequential_CASE_call_AND_batch_AND_mono_channel_error():
+    input = np.random.randn(16, 5000)
+
+    instance = E.Sequential([
+        E.TimeReverse(always_apply=True),
+    ], always_apply=True)
+
+    with pytest.raises(ValueError):
+        instance(ecg=input, batched=True)
+
+@pytest.mark.core
+def test_OneOf_CASE_call_AND_batch():
+    input = np.random.randn(16, 5000, 12)
+
+    instance = E.Sequential([
+        E.TimeReverse(always_apply=True),
+        E.OneOf([
+            E.TimeReverse(),
+            E.TimeReverse(),
+        ], always_apply=True),
+    ], always_apply=True)
+
+    output = instance(ecg=input, batched=True)['ecg']
+
+    assert np.allclose(output, input)
+
+@pytest.mark.core
+def test_Sequential_CASE_set_random_state_AND_seed():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.GaussNoise(always_apply=True),
+        E.OneOf([
+            E.TimeShift(),
+            E.AmplitudeScale(),
+        ]),
+    ], always_apply=True)
+
+    first = instance.set_random_state(42)(ecg=input)['ecg']
+    second = instance.set_random_state(42)(ecg=input)['ecg']
+    third = instance.set_random_state(43)(ecg=input)['ecg']
+
+    assert np.allclose(first, second)
+    assert not np.allclose(first, third)
+
+@pytest.mark.core
+def test_Sequential_CASE_set_random_state_AND_spawn():
+    instance = E.Sequential([
+        E.GaussNoise(),
+        E.GaussNoise(),
+    ])
+
+    instance.set_random_state(42)
+
+    first, second = instance[0].random_state, instance[1].random_state
+
+    assert first is not second
+    assert first.random() != second.random()
+
+@pytest.mark.core
+def test_Sequential_CASE_compile_AND_fusion():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.AmplitudeScale(),
+        E.AmplitudeInvert(),
+        E.GaussNoise(),
+        E.PowerlineNoise(),
+        E.TimeReverse(),
+        E.SquarePulse(),
+        E.RespirationNoise(),
+    ], always_apply=True)
+
+    compiled = instance.compile()
+
+    assert isinstance(compiled[0], E.FusedSequential)
+    assert len(compiled[0]) == 4
+    assert isinstance(compiled[2], E.FusedSequential)
+
+    for seed in range(8):
+        expected = instance.set_random_state(seed)(ecg=input)['ecg']
+
+        instance.set_random_state(seed)
+        output = compiled(ecg=input)['ecg']
+
+        assert np.allclose(output, expected)
+
+@pytest.mark.core
+def test_Sequential_CASE_compile_AND_nested():
+    instance = E.Sequential([
+        E.OneOf([
+            E.Sequential([
+                E.AmplitudeScale(),
+                E.AmplitudeInvert(),
+            ]),
+        ]),
+        E.AmplitudeScale(),
+    ], always_apply=True)
+
+    compiled = instance.compile()
+
+    assert isinstance(compiled[0][0][0], E.FusedSequential)
+    assert isinstance(compiled[1], E.AmplitudeScale)
+    assert not isinstance(instance[0][0][0], E.FusedSequential)
+
+@pytest.mark.core
+def test_FusedSequential_CASE_call_AND_probability():
+    input = np.ones((100, 2))
+
+    instance = E.FusedSequential([
+        E.AmplitudeInvert(always_apply=True),
+        E.AmplitudeScale(always_apply=True),
+    ], p=0.5).set_random_state(0)
+
+    applied = [instance(ecg=input)['ecg'] is not input for _ in range(4000)]
+
+    assert 0.45 < np.mean(applied) < 0.55
+
+@pytest.mark.core
+def test_FusedSequential_CASE_create_AND_not_affine_error():
+    with pytest.raises(RuntimeError, match=r'object at \d+ position is not affine augmentation'):
+        instance = E.FusedSequential([
+            E.AmplitudeInvert(),
+            E.TimeReverse(),
+        ])
+
+@pytest.mark.core
+def test_FusedSequential_CASE_call_AND_batch():
+    input = np.random.randn(4, 5000, 12)
+
+    instance = E.FusedSequential([
+        E.AmplitudeInvert(always_apply=True),
+        E.AmplitudeInvert(always_apply=True),
+    ], always_apply=True)
+
+    output = instance(ecg=input, batched=True)['ecg']
+
+    assert np.allclose(output, input)
+
+@pytest.mark.core
+def test_Sequential_CASE_inplace_AND_same_result():
+    input = np.random.randn(5000, 12)
+    mask = np.zeros((5000, 1))
+
+    transforms = [
+        E.AmplitudeScale(),
+        E.AmplitudeInvert(),
+        E.GaussNoise(),
+        E.ChannelDropout(),
+        E.TimeShift(),
+        E.TimeCutout(mask_fill_value=1),
+        E.ToChannels(E.SinePulse(), channels=[0, 3]),
+        E.OneOf([E.SquarePulse(), E.TimeReverse()]),
+        E.RandomTimeCrop(length=2500),
+        E.AmplitudeInvert(),
+    ]
+
+    instance = E.Sequential(transforms, always_apply=True)
+    inplace_instance = E.Sequential(transforms, always_apply=True, inplace=True)
+
+    for seed in range(8):
+        input_copy, mask_copy = np.copy(input), np.copy(mask)
+
+        expected = instance.set_random_state(seed)(ecg=input, mask=mask)
+        output = inplace_instance.set_random_state(seed)(ecg=input, mask=mask)
+
+        assert np.allclose(output['ecg'], expected['ecg'])
+        assert np.allclose(output['mask'], expected['mask'])
+
+        assert np.array_equal(input, input_copy)
+        assert np.array_equal(mask, mask_copy)
+
+@pytest.mark.core
+def test_Sequential_CASE_inplace_AND_not_applied():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.AmplitudeInvert(always_apply=True),
+    ], p=0., inplace=True)
+
+    output = instance(ecg=input)['ecg']
+
+    assert output is input
+
+@pytest.mark.core
+def test_Sequential_CASE_inplace_AND_non_array_data():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.AmplitudeInvert(always_apply=True),
+    ], inplace=True)
+
+    output = instance(ecg=input, label=3, name='record', tags=['a', 'b'])
+
+    assert np.allclose(output['ecg'], -input)
+    assert output['label'] == 3 and type(output['label']) is int
+    assert output['name'] == 'record'
+    assert output['tags'] == ['a', 'b']
+
+@pytest.mark.core
+def test_Sequential_CASE_stats_AND_nested():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.AmplitudeInvert(),
+        E.OneOf([
+            E.GaussNoise(),
+            E.TimeShift(),
+        ]),
+        E.ToChannels(E.SinePulse(), channels=[0, 1]),
+    ], always_apply=True).enable_stats()
+
+    tracemalloc.start()
+
+    try:
+        for _ in range(10):
+            instance(ecg=input)
+    finally:
+        tracemalloc.stop()
+
+    stats = instance.stats()
+
+    assert instance.statistics.calls == 10
+    assert instance.statistics.max_allocated > 0
+    assert instance[1].statistics.applied == instance[1][0].statistics.calls + instance[1][1].statistics.calls
+    assert instance[2].transform.statistics.calls == 10
+
+    assert len(stats.splitlines()) == len(repr(instance).splitlines())
+    assert stats.count('# calls') == 7
+
+@pytest.mark.core
+def test_Sequential_CASE_stream_AND_same_result():
+    input = np.random.randn(10000, 12)
+
+    instance = E.Sequential([
+        E.AmplitudeScale(),
+        E.GaussNoise(),
+        E.ToChannels(E.Sequential([E.GaussBlur(), E.SinePulse()], always_apply=True), channels=[0, 3, 5]),
+        E.OneOf([E.LowPassFilter(), E.HighPassFilter()]),
+        E.NonSequential([E.Pooling(), E.TimeCutout(), E.SquarePulse()]),
+        E.ToChannels(E.AmplitudeInvert(), channels=[1, 2, 3]),
+    ], always_apply=True)
+
+    for seed in range(8):
+        bounds = np.sort(np.random.default_rng(seed).integers(0, len(input), size=10))
+
+        expected = copy.deepcopy(instance).set_random_state(seed)(ecg=input)['ecg']
+        chunks = list(copy.deepcopy(instance).set_random_state(seed).stream(np.split(input, bounds), len(input)))
+
+        assert np.allclose(np.concatenate(chunks), expected)
+
+@pytest.mark.core
+def test_Sequential_CASE_stream_AND_not_supported():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([E.AmplitudeInvert(), E.TimeReverse(always_apply=True)], always_apply=True)
+
+    with pytest.raises(NotImplementedError, match=r'Class TimeReverse does not support streaming'):
+        list(instance.stream(np.array_split(input, 4), len(input)))
+
+@pytest.mark.core
+@pytest.mark.parametrize('seed', range(8))
+def test_Sequential_CASE_stream_AND_not_supported_AND_not_applied(seed):
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.AmplitudeInvert(),
+        E.OneOf([E.GaussNoise(), E.ToChannels(E.TimeShift(p=0.5), channels=[0, 1])]),
+    ], p=0.5).set_random_state(seed)
+
+    chunks = np.array_split(input, 4)
+
+    with pytest.raises(NotImplementedError, match=r'Class TimeShift does not support streaming'):
+        instance.stream(iter(chunks), len(input))
+
+@pytest.mark.core
+@pytest.mark.parametrize('inplace', [False, True])
+def test_Sequential_CASE_call_AND_memmap(tmp_path, inplace):
+    input = np.random.randn(50000, 12)
+    path = tmp_path / 'ecg.npy'
+    np.save(path, input)
+
+    instance = E.Sequential([
+        E.RandomTimeCrop(length=1000),
+        E.GaussNoise(always_apply=True),
+        E.AmplitudeInvert(always_apply=True),
+    ], inplace=inplace)
+
+    expected = instance.set_random_state(0)(ecg=input)['ecg']
+    output = instance.set_random_state(0)(ecg=np.load(path, mmap_mode='r'))['ecg']
+
+    assert not isinstance(output, np.memmap)
+    assert np.array_equal(output, expected)
+    assert np.array_equal(np.load(path), input)
+
+@pytest.mark.core
+def test_Sequential_CASE_compile_AND_crop_first():
+    instance = E.Sequential([
+        E.LowPassFilter(),
+        E.AmplitudeScale(),
+        E.GaussNoise(),
+        E.GaussBlur(),
+        E.RandomTimeCrop(length=1000),
+        E.AmplitudeInvert(),
+        E.TimeReverse(),
+        E.AmplitudeScale(),
+        E.TimeCrop(length=500),
+    ])
+
+    compiled = instance.compile(crop_first=True)
+
+    assert [type(t) for t in compiled] == [
+        E.LowPassFilter, E.CropFirstSequential, E.AmplitudeInvert, E.TimeReverse, E.CropFirstSequential
+    ]
+    assert [type(t) for t in compiled[1]] == [E.RandomTimeCrop, E.FusedSequential, E.GaussBlur]
+    assert [type(t) for t in compiled[4]] == [E.TimeCrop, E.AmplitudeScale]
+
+    assert not any(isinstance(t, E.CropFirstSequential) for t in instance.compile())
+
+@pytest.mark.core
+def test_Sequential_CASE_compile_AND_crop_first_AND_nested():
+    input = np.random.randn(5000, 12)
+
+    instance = E.Sequential([
+        E.OneOf([
+            E.Sequential([
+                E.GaussBlur(kernel_size_range=(7, 7), always_apply=True),
+                E.CenterTimeCrop(length=1000, always_apply=True),
+            ], always_apply=True),
+        ], p=1.),
+        E.ToChannels(E.Sequential([
+            E.AmplitudeScale(always_apply=True),
+            E.AmplitudeInvert(always_apply=True),
+        ], always_apply=True), channels=[0, 1], always_apply=True),
+    ]).set_random_state(0)
+
+    compiled = copy.deepcopy(instance).compile(crop_first=True)
+
+    assert [type(t) for t in compiled[0][0]] == [E.CropFirstSequential]
+    assert [type(t) for t in compiled[0][0][0]] == [E.CenterTimeCrop, E.GaussBlur]
+    assert [type(t) for t in compiled[1].transform] == [E.FusedSequential]
+    assert [type(t) for t in instance[0][0]] == [E.GaussBlur, E.CenterTimeCrop]
+
+    expected = instance(ecg=input)['ecg']
+    output = compiled(ecg=input)['ecg']
+
+    assert np.allclose(output, expected)
+
+@pytest.mark.core
+@pytest.mark.parametrize('position', ['left', 'center', 'right', 'random'])
+def test_Sequential_CASE_compile_AND_crop_first_same_result(position):
+    input = np.random.randn(5000, 12)
+    mask = np.random.randint(0, 2, (5000, 1))
+
+    instance = E.Sequential([
+        E.AmplitudeInvert(always_apply=True),
+        E.GaussBlur(kernel_size_range=(7, 7), always_apply=True),
+        E.Pooling(kernel_size_range=(5, 5), always_apply=True),
+        E.ToChannels(E.Blur(kernel_size_range=(3, 3), always_apply=True), channels=[0, 1], always_apply=True),
+        E.TimeCrop(length=1000, position=position),
+    ]).set_random_state(0)
+
+    compiled = copy.deepcopy(instance).compile(crop_first=True)
+
+    assert type(compiled[0]) is E.CropFirstSequential
+
+    for _ in range(4):
+        expected = instance(ecg=input, mask=mask)
+        output = compiled(ecg=input, mask=mask)
+
+        assert np.allclose(output['ecg'], expected['ecg'])
+        assert np.array_equal(output['mask'], expected['mask'])
+
+    output = compiled(ecg=np.stack([input, input]), batched=True)['ecg']
+
+    assert output.shape == (2, 1000, 12)
+
+@pytest.mark.core
+def test_Sequential_CASE_compile_AND_crop_first_AND_label():
+    input = np.random.randn(5000, 12)
+    label = np.arange(5000)
+
+    instance = E.Sequential([
+        E.GaussNoise(always_apply=True),
+        E.RandomTimeCrop(length=100, always_apply=True),
+    ]).compile(crop_first=True)
+
+    output = instance(ecg=input, label=3, labels=label)
+
+    assert output['ecg'].shape == (100, 12)
+    assert output['label'] == 3
+    assert output['labels'] is label
+
+@pytest.mark.core
+def test_CropFirstSequential_CASE_create_AND_errors():
+    with pytest.raises(RuntimeError, match=r'object at 0 position is not time crop'):
+        E.CropFirstSequential([E.AmplitudeInvert(), E.TimeCrop(length=1000)])
+
+    with pytest.raises(RuntimeError, match=r'object at 2 position does not commute with time crop'):
+        E.CropFirstSequential([E.TimeCrop(length=1000), E.AmplitudeInvert(), E.TimeReverse()])
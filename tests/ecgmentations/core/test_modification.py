@@ -38,3 +38,116 @@ def test_ToChannels_CASE_call_AND_zero_channel():
 
     assert tmask.shape == mask.shape
     assert not np.array_equal(tmask, mask)
+
+@pytest.mark.core
+def test_ToChannels_CASE_call_AND_batch():
+    ecg = np.random.randn(8, 5000, 12)
+
+    channels = [0, 3]
+    exchannels = [ ch for ch in np.arange(12) if ch not in channels]
+
+    instance = E.ToChannels(
+        E.TimeReverse(always_apply=True)
+    , channels=channels, always_apply=True)
+
+    tecg = instance(ecg=ecg, batched=True)['ecg']
+
+    assert tecg.shape == ecg.shape
+    assert np.allclose(tecg[..., channels], ecg[:, ::-1, channels])
+    assert np.allclose(tecg[..., exchannels], ecg[..., exchannels])
+
+@pytest.mark.core
+@pytest.mark.parametrize('channels', [[0, 3], [2, 3, 4], [1, 5, 9], [7, 2], [11]])
+def test_ToChannels_CASE_call_AND_channels(channels):
+    ecg = np.random.randn(5000, 12)
+
+    exchannels = [ ch for ch in np.arange(12) if ch not in channels]
+
+    instance = E.ToChannels(
+        E.AmplitudeInvert(always_apply=True)
+    , channels=channels, always_apply=True)
+
+    tecg = instance(ecg=np.copy(ecg))['ecg']
+
+    assert np.allclose(tecg[:, channels], -ecg[:, channels])
+    assert np.allclose(tecg[:, exchannels], ecg[:, exchannels])
+
+@pytest.mark.core
+@pytest.mark.parametrize('channels', [[0, 1], [0, 2, 3]])
+def test_ToChannels_CASE_call_AND_not_applied_transform(channels):
+    ecg = np.random.randn(5000, 12)
+
+    instance = E.ToChannels(
+        E.AmplitudeInvert(p=0.)
+    , channels=channels, always_apply=True)
+
+    tecg = instance(ecg=ecg)['ecg']
+
+    assert tecg is ecg
+
+@pytest.mark.core
+@pytest.mark.parametrize('channels', [[0, 3], [2, 3, 4]])
+def test_ToChannels_CASE_call_AND_batch_subset(channels):
+    ecg = np.random.randn(64, 5000, 12)
+    mask = np.random.randn(64, 5000, 1)
+
+    exchannels = [ ch for ch in np.arange(12) if ch not in channels]
+
+    instance = E.ToChannels(
+        E.TimeReverse(always_apply=True)
+    , channels=channels, p=0.5)
+
+    transformed = instance(ecg=ecg, mask=mask, batched=True)
+    tecg, tmask = transformed['ecg'], transformed['mask']
+
+    assert np.allclose(tmask, mask[:, ::-1])
+    assert np.allclose(tecg[..., channels], ecg[:, ::-1, channels])
+
+    reversed = np.all(np.isclose(tecg[..., exchannels], ecg[:, ::-1, exchannels]), axis=(1, 2))
+    kept = np.all(np.isclose(tecg[..., exchannels], ecg[..., exchannels]), axis=(1, 2))
+
+    assert np.all(reversed | kept)
+    assert np.any(reversed) and np.any(kept)
+
+@pytest.mark.core
+@pytest.mark.parametrize('channels', [[0, 2, 5], [0, 2, 4]])
+def test_ToChannels_CASE_call_AND_inplace(channels):
+    ecg = np.ones((100, 6))
+
+    exchannels = [ ch for ch in np.arange(6) if ch not in channels]
+
+    instance = E.Sequential([
+        E.ToChannels(E.AmplitudeInvert(p=1.0), channels=channels, p=1.0),
+    ], inplace=True)
+
+    tecg = instance(ecg=np.copy(ecg))['ecg']
+
+    assert np.allclose(tecg[:, channels], -1.)
+    assert np.allclose(tecg[:, exchannels], 1.)
+
+@pytest.mark.core
+def test_ToChannels_CASE_call_AND_batch_not_applied_transform():
+    ecg = np.random.randn(8, 5000, 12)
+
+    instance = E.ToChannels(
+        E.AmplitudeInvert(p=0.)
+    , channels=[0, 2, 5], always_apply=True)
+
+    tecg = instance(ecg=ecg, batched=True)['ecg']
+
+    assert np.allclose(tecg, ecg)
+
+@pytest.mark.core
+def test_ToChannels_CASE_call_AND_batch_subset_AND_other_data():
+    ecg = np.random.randn(64, 1000, 12)
+    labels = np.arange(64)
+
+    instance = E.ToChannels(
+        E.AmplitudeInvert(always_apply=True)
+    , channels=[0, 2, 5], p=0.5).set_random_state(0)
+
+    output = instance(ecg=ecg, labels=labels, names=['record'] * 64, meta='x', batched=True)
+
+    assert np.array_equal(output['labels'], labels)
+    assert output['names'] == ['record'] * 64
+    assert output['meta'] == 'x'
@@ -1,4 +1,7 @@
+import copy
+import pickle
 import pytest
+import multiprocessing
 
 import numpy as np
 import ecgmentations as E
@@ -23,3 +26,171 @@ def test_Identity_CASE_call():
     expected = input
 
     assert np.allclose(output, expected)
+
+@pytest.mark.core
+def test_Transformation_CASE_set_random_state_AND_seed():
+    input = np.random.randn(5000, 12)
+
+    instance = E.GaussNoise(always_apply=True)
+
+    first = instance.set_random_state(42)(ecg=input)['ecg']
+    second = instance.set_random_state(42)(ecg=input)['ecg']
+
+    assert np.allclose(first, second)
+
+@pytest.mark.core
+def test_Transformation_CASE_set_random_state_AND_generator():
+    generator = np.random.default_rng(42)
+
+    instance = E.GaussNoise(always_apply=True).set_random_state(generator)
+
+    assert instance.random_state is generator
+
+def draw_in_worker(instance, queue, seed=None):
+    if seed is not None:
+        instance.set_random_state(seed)
+
+    queue.put(instance(ecg=np.zeros((100, 2)))['ecg'])
+
+@pytest.mark.core
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='fork is not available')
+@pytest.mark.parametrize('seed', [None, 42])
+def test_Transformation_CASE_random_state_AND_fork(seed):
+    context = multiprocessing.get_context('fork')
+
+    instance = E.Sequential([E.GaussNoise(always_apply=True), E.AmplitudeScale()], always_apply=True)
+
+    if seed is not None:
+        instance.set_random_state(seed)
+
+    queue = context.Queue()
+    workers = [context.Process(target=draw_in_worker, args=(instance, queue)) for _ in range(2)]
+
+    for worker in workers:
+        worker.start()
+
+    outputs = [queue.get(timeout=60) for _ in workers]
+
+    for worker in workers:
+        worker.join()
+
+    assert not np.allclose(outputs[0], outputs[1])
+
+@pytest.mark.core
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='fork is not available')
+def test_Transformation_CASE_set_random_state_AND_fork():
+    context = multiprocessing.get_context('fork')
+
+    instance = E.Sequential([E.GaussNoise(always_apply=True), E.AmplitudeScale()], always_apply=True)
+
+    queue = context.Queue()
+    workers = [context.Process(target=draw_in_worker, args=(instance, queue, 42)) for _ in range(2)]
+
+    for worker in workers:
+        worker.start()
+
+    outputs = [queue.get(timeout=60) for _ in workers]
+
+    for worker in workers:
+        worker.join()
+
+    assert np.allclose(outputs[0], outputs[1])
+
+@pytest.mark.core
+def test_Augmentation_CASE_call_AND_other_targets():
+    input = np.random.randn(5000, 12)
+    label = np.array([1])
+
+    instance = E.AmplitudeInvert(always_apply=True)
+
+    output = instance(ecg=input, mask=None, label=label)
+
+    assert np.allclose(output['ecg'], -input)
+    assert output['mask'] is None
+    assert output['label'] is label
+
+@pytest.mark.core
+def test_Augmentation_CASE_call_AND_copy():
+    input = np.random.randn(5000, 12)
+
+    instance = E.ChannelDropout(channel_drop_range=(1, 1), fill_value=0, always_apply=True)
+    instance(ecg=input)
+
+    copied = copy.copy(instance)
+    copied.fill_value = 1
+
+    output = copied(ecg=input)['ecg']
+
+    assert np.sum(output == 1) == 5000
+
+@pytest.mark.core
+def test_Transformation_CASE_enable_stats():
+    input = np.random.randn(5000, 12)
+
+    instance = E.AmplitudeInvert(p=0.5).enable_stats()
+
+    for _ in range(20):
+        instance(ecg=input)
+
+    instance(ecg=np.random.randn(4, 5000, 12), batched=True)
+
+    assert isinstance(instance, E.AmplitudeInvert)
+    assert instance.statistics.calls == 21
+    assert instance.statistics.samples == 24
+    assert 0 < instance.statistics.applied < 24
+    assert instance.statistics.total_time > 0
+    assert 'calls: 21' in instance.stats()
+
+@pytest.mark.core
+def test_Transformation_CASE_disable_stats():
+    input = np.random.randn(5000, 12)
+
+    instance = E.AmplitudeInvert(always_apply=True).enable_stats()
+    instance(ecg=input)
+    instance.disable_stats()
+    instance(ecg=input)
+
+    assert type(instance) is E.AmplitudeInvert
+    assert not instance.is_stats_enabled()
+    assert instance.statistics.calls == 1
+
+@pytest.mark.core
+def test_Transformation_CASE_enable_stats_AND_pickle():
+    instance = E.AmplitudeInvert(always_apply=True).enable_stats()
+    instance(ecg=np.random.randn(5000, 12))
+
+    restored = pickle.loads(pickle.dumps(instance))
+
+    assert restored.is_stats_enabled()
+    assert restored.statistics.calls == 1
+
+@pytest.mark.core
+def test_Augmentation_CASE_call_AND_batch_subset_AND_other_data():
+    input = np.random.randn(64, 1000, 12)
+    labels = np.arange(64)
+
+    instance = E.GaussNoise(p=0.5).set_random_state(0)
+
+    output = instance(ecg=input, labels=labels, names=['record'] * 64, meta='x', batched=True)
+
+    applied = ~np.all(np.isclose(output['ecg'], input), axis=(1, 2))
+
+    assert np.any(applied) and not np.all(applied)
+    assert np.array_equal(output['labels'], labels)
+    assert output['names'] == ['record'] * 64
+    assert output['meta'] == 'x'
+
+@pytest.mark.core
+def test_Transformation_CASE_random_state_AND_pickle_from_other_process():
+    input = np.zeros((100, 2))
+
+    instance = E.GaussNoise(always_apply=True).set_random_state(42)
+
+    same_process = [pickle.loads(pickle.dumps(instance))(ecg=input)['ecg'] for _ in range(2)]
+
+    instance.random_state_pid = -1
+
+    other_process = [pickle.loads(pickle.dumps(instance))(ecg=input)['ecg'] for _ in range(2)]
+
+    assert np.allclose(same_process[0], same_process[1])
+    assert not np.allclose(other_process[0], other_process[1])
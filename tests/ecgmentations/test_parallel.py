@@ -0,0 +1,48 @@
+import pytest
+
+import numpy as np
+import ecgmentations as E
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_map_CASE_order(backend):
+    records = [np.full((100, 12), idx, dtype=np.float64) for idx in range(20)]
+
+    instance = E.TimeReverse(always_apply=True)
+
+    outputs = list(E.parallel.map(instance, records, workers=2, backend=backend, chunksize=3))
+
+    assert len(outputs) == len(records)
+    assert all(np.allclose(output, record) for output, record in zip(outputs, records))
+
+def test_map_CASE_dict_records():
+    records = [{'ecg': np.random.randn(100, 12), 'mask': np.arange(100)[:, None]} for _ in range(5)]
+
+    instance = E.TimeReverse(always_apply=True)
+
+    outputs = list(E.parallel.map(instance, records, workers=2))
+
+    assert all(np.array_equal(output['mask'], record['mask'][::-1]) for output, record in zip(outputs, records))
+
+def test_map_CASE_unordered():
+    records = [np.full((100, 12), idx, dtype=np.float64) for idx in range(20)]
+
+    instance = E.Identity(always_apply=True)
+
+    outputs = list(E.parallel.map(instance, records, workers=4, chunksize=1, ordered=False))
+
+    assert sorted(output[0, 0] for output in outputs) == list(range(20))
+
+def test_map_CASE_random_state():
+    records = [np.zeros((100, 12)) for _ in range(20)]
+
+    instance = E.GaussNoise(always_apply=True)
+
+    first = list(E.parallel.map(instance, records, workers=2, chunksize=4, random_state=42))
+    second = list(E.parallel.map(instance, records, workers=4, chunksize=4, random_state=42))
+
+    assert all(np.allclose(f, s) for f, s in zip(first, second))
+    assert not np.allclose(first[0], first[4])
+
+def test_map_CASE_invalid_backend():
+    with pytest.raises(ValueError):
+        list(E.parallel.map(E.Identity(), [], backend='gpu'))